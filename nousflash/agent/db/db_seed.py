@@ -6,7 +6,7 @@ import requests
 from sqlalchemy.orm import Session
 from models import User, Post, Comment, Like, LongTermMemory
 from db.db_setup import SessionLocal, engine
-from openai import OpenAI
+from engines.long_term_mem import import_memories
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -30,15 +30,6 @@ def load_example_content(filename="examples.txt"):
         print("Looking for file in:", current_dir)
         raise
 
-def create_embedding(text):
-    """Create embedding using OpenAI API."""
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    response = client.embeddings.create(
-        input=text,
-        model="text-embedding-3-small"
-    )
-    return response.data[0].embedding
-
 def seed_database():
     db = SessionLocal()
 
@@ -103,16 +94,16 @@ def seed_database():
     if remaining_examples:
         num_memories = min(3, len(remaining_examples))
         memory_examples = random.sample(remaining_examples, num_memories)
-        
-        for content in memory_examples:
-            embedding = create_embedding(content)
-            memory = LongTermMemory(
-                content=content,
-                embedding=str(embedding),
-                significance_score=random.uniform(7.0, 10.0)
-            )
-            db.add(memory)
-    db.commit()
+
+        # One batched embeddings request for all seed memories
+        import_memories(
+            db,
+            [
+                {"content": content, "significance_score": random.uniform(7.0, 10.0)}
+                for content in memory_examples
+            ],
+            os.getenv('OPENAI_API_KEY')
+        )
 
     db.close()
 
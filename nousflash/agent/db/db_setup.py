@@ -1,7 +1,8 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from models import Base, User, Post, Comment, Like, LongTermMemory
+from db.vectors import legacy_text_to_blob
 
 # Database URL
 DB_PATH = os.getenv("SQLITE_DB_PATH", "./data/agents.db")
@@ -19,6 +20,46 @@ def create_database():
     """Create all tables in the database."""
     Base.metadata.create_all(bind=engine)
 
+def migrate_database():
+    """
+    Bring an existing database up to date with the current models.
+
+    Creates any tables and columns added since the database was first seeded
+    and converts long-term memory embeddings that older versions stored as
+    str(list) text into packed float32 blobs. Safe to run on every startup.
+    """
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        memory_columns = {
+            row[1] for row in conn.execute(text("PRAGMA table_info(long_term_memories)"))
+        }
+        if "embedding_model" not in memory_columns:
+            # Everything stored before backends were pluggable came from OpenAI
+            conn.execute(text("ALTER TABLE long_term_memories ADD COLUMN embedding_model VARCHAR"))
+            conn.execute(text("UPDATE long_term_memories SET embedding_model = 'text-embedding-3-small'"))
+        if "embedding_dim" not in memory_columns:
+            conn.execute(text("ALTER TABLE long_term_memories ADD COLUMN embedding_dim INTEGER"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_long_term_memories_embedding_model "
+            "ON long_term_memories (embedding_model)"
+        ))
+
+        legacy_rows = conn.execute(
+            text("SELECT id, embedding FROM long_term_memories WHERE typeof(embedding) = 'text'")
+        ).fetchall()
+        for memory_id, embedding_text in legacy_rows:
+            conn.execute(
+                text("UPDATE long_term_memories SET embedding = :embedding WHERE id = :id"),
+                {"embedding": legacy_text_to_blob(embedding_text), "id": memory_id},
+            )
+        conn.execute(text(
+            "UPDATE long_term_memories SET embedding_dim = length(embedding) / 4 WHERE embedding_dim IS NULL"
+        ))
+
+    if legacy_rows:
+        print(f"Migrated {len(legacy_rows)} long-term memory embeddings to float32 blobs.")
+
 def get_db():
     """Dependency to get DB session."""
     db = SessionLocal()
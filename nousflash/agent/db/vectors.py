@@ -0,0 +1,61 @@
+import json
+from typing import List, Optional, Union
+import numpy as np
+
+# Embeddings are stored as packed little-endian float32 blobs. A 1536-dim
+# vector takes 6KB instead of ~30KB of text, and decoding is a zero-copy view.
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+
+def pack_embedding(embedding: Union[List[float], np.ndarray]) -> bytes:
+    """
+    Pack an embedding vector into a float32 blob for storage.
+
+    Args:
+        embedding (List[float] | np.ndarray): Embedding vector
+
+    Returns:
+        bytes: Packed float32 representation
+    """
+    return np.asarray(embedding, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def unpack_embedding(blob: bytes) -> np.ndarray:
+    """
+    Decode a stored embedding blob without copying.
+
+    Args:
+        blob (bytes): Packed float32 representation
+
+    Returns:
+        np.ndarray: Read-only float32 view over the blob
+    """
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+
+
+def legacy_text_to_blob(text: str) -> bytes:
+    """Convert an embedding stored by older versions as str(list) into a blob."""
+    return pack_embedding(json.loads(text))
+
+
+def fit_embedding(embedding: np.ndarray, dim: int) -> Optional[np.ndarray]:
+    """
+    Shorten an embedding to `dim` components and renormalize it.
+
+    text-embedding-3 models are trained so that a prefix of the full vector is itself a usable
+    embedding, which lets vectors stored at full size be compared with shortened ones.
+
+    Args:
+        embedding (np.ndarray): Stored embedding vector
+        dim (int): Target dimension
+
+    Returns:
+        Optional[np.ndarray]: The fitted vector, or None if the embedding is shorter than dim
+    """
+    if embedding.shape[0] == dim:
+        return embedding
+    if embedding.shape[0] < dim:
+        return None
+    truncated = np.asarray(embedding[:dim], dtype=EMBEDDING_DTYPE)
+    norm = np.linalg.norm(truncated)
+    return truncated / norm if norm > 0 else truncated
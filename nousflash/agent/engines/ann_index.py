@@ -0,0 +1,192 @@
+# ANN Index
+# Objective: Optional inverted-file (IVF) index over long-term memory embeddings so that retrieval
+# only scores the memories in the few clusters closest to the query once the store gets large.
+
+# The coarse centroids and the memory -> cluster assignments are persisted as .npy files next to
+# agents.db and memory-mapped on startup, so k-means only runs when the store has grown well past
+# the size it was last trained on. Assignments of memories added since are kept in memory and
+# written on close; after a crash they are recomputed from the centroids on the next startup.
+
+# Settings:
+# LTM_ANN_INDEX     "true" to enable the index (default off, exact search only)
+# LTM_ANN_NPROBE    clusters scored per query; higher = better recall, slower (default 8)
+# LTM_ANN_MIN_SIZE  below this many memories exact search is used (default 5000)
+
+import os
+from typing import Callable, Optional
+import numpy as np
+from db.db_setup import DB_PATH
+
+ANN_ENABLED = os.getenv("LTM_ANN_INDEX", "false").lower() == "true"
+ANN_NPROBE = int(os.getenv("LTM_ANN_NPROBE", "8"))
+ANN_MIN_SIZE = int(os.getenv("LTM_ANN_MIN_SIZE", "5000"))
+
+_INDEX_PREFIX = os.path.splitext(DB_PATH)[0]
+CENTROIDS_PATH = f"{_INDEX_PREFIX}.ivf_centroids.npy"
+ASSIGNMENTS_PATH = f"{_INDEX_PREFIX}.ivf_assignments.npy"
+
+# Retrain once the store is this many times larger than the training set
+_RETRAIN_GROWTH = 4
+_KMEANS_ITERATIONS = 10
+_KMEANS_SAMPLES_PER_LIST = 64
+# Rows read from the memory index at a time when assigning every memory to a list
+_ASSIGN_BLOCK_SIZE = 4096
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _save_npy(path: str, array: np.ndarray):
+    """Write an array atomically so a crash never leaves a truncated index file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+class IVFIndex:
+    """Coarse-quantizer index mapping each memory row to its nearest centroid."""
+
+    def __init__(self):
+        self.centroids: Optional[np.ndarray] = None
+        self.lists = np.empty(0, dtype=np.int32)
+        self.trained_size = 0
+        # Assignments changed since they were last written to disk
+        self.dirty = False
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def attach(self, get_rows: Callable[[np.ndarray], np.ndarray], ids: np.ndarray):
+        """
+        Load the persisted index for the given memories, training a new one if needed.
+
+        Args:
+            get_rows (Callable[[np.ndarray], np.ndarray]): Returns the float32 embeddings of the
+                given rows of the memory index
+            ids (np.ndarray): Memory ids aligned with the index rows
+        """
+        self.centroids = None
+        self.lists = np.full(len(ids), -1, dtype=np.int32)
+
+        if len(ids) < ANN_MIN_SIZE:
+            return
+
+        if os.path.exists(CENTROIDS_PATH) and os.path.exists(ASSIGNMENTS_PATH):
+            centroids = np.load(CENTROIDS_PATH, mmap_mode="r")
+            assignments = np.load(ASSIGNMENTS_PATH, mmap_mode="r")
+            if centroids.shape[1] == get_rows(np.arange(1)).shape[1]:
+                self.centroids = centroids
+                # train() uses sqrt(n) lists, so this recovers the size it was trained on
+                self.trained_size = len(centroids) ** 2
+                known = dict(zip(assignments[:, 0].tolist(), assignments[:, 1].tolist()))
+                self.lists = np.array([known.get(memory_id, -1) for memory_id in ids.tolist()], dtype=np.int32)
+
+                # Memories stored by a process that crashed before saving
+                missing = np.flatnonzero(self.lists < 0)
+                if len(missing):
+                    self.lists[missing] = self.assign_rows(get_rows, missing)
+                    self.dirty = True
+
+        if self.centroids is None or len(ids) > _RETRAIN_GROWTH * self.trained_size:
+            self.train(get_rows, ids)
+
+    def train(self, get_rows: Callable[[np.ndarray], np.ndarray], ids: np.ndarray):
+        """
+        Run spherical k-means over a sample of the memories and persist the result.
+
+        Args:
+            get_rows (Callable[[np.ndarray], np.ndarray]): Returns the float32 embeddings of the
+                given rows of the memory index
+            ids (np.ndarray): Memory ids aligned with the index rows
+        """
+        size = len(ids)
+        n_lists = max(1, int(np.sqrt(size)))
+        rng = np.random.default_rng(0)
+
+        sample_size = min(size, n_lists * _KMEANS_SAMPLES_PER_LIST)
+        sample = _normalize(get_rows(rng.choice(size, sample_size, replace=False)))
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(_KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for list_no in range(n_lists):
+                members = sample[labels == list_no]
+                if len(members):
+                    centroids[list_no] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        self.centroids = centroids.astype(np.float32)
+        self.lists = self.assign_rows(get_rows, np.arange(size))
+        self.trained_size = size
+        self.save(ids)
+        print(f"Trained IVF index with {n_lists} lists over {len(ids)} memories.")
+
+    def assign(self, vectors: np.ndarray) -> np.ndarray:
+        """Return the nearest centroid for each vector."""
+        return np.argmax(np.atleast_2d(vectors) @ self.centroids.T, axis=1).astype(np.int32)
+
+    def assign_rows(self, get_rows: Callable[[np.ndarray], np.ndarray], rows: np.ndarray) -> np.ndarray:
+        """Return the nearest centroid for each of the given rows, reading them a block at a time."""
+        lists = np.empty(len(rows), dtype=np.int32)
+        for start in range(0, len(rows), _ASSIGN_BLOCK_SIZE):
+            block = rows[start:start + _ASSIGN_BLOCK_SIZE]
+            lists[start:start + len(block)] = self.assign(get_rows(block))
+        return lists
+
+    def add(self, vector: np.ndarray, ids: np.ndarray, get_rows: Callable[[np.ndarray], np.ndarray]):
+        """
+        Index the newest memory, training or retraining when the store has grown enough.
+
+        Args:
+            vector (np.ndarray): Embedding of the newest memory
+            ids (np.ndarray): Memory ids aligned with the index rows, newest last
+            get_rows (Callable[[np.ndarray], np.ndarray]): Returns the float32 embeddings of the
+                given rows of the memory index, only called to train
+        """
+        if len(ids) < ANN_MIN_SIZE:
+            return
+        if not self.trained or len(ids) > _RETRAIN_GROWTH * self.trained_size:
+            self.train(get_rows, ids)
+            return
+
+        self.lists = np.append(self.lists, self.assign(vector))
+        self.dirty = True
+
+    def candidate_rows(self, query: np.ndarray, nprobe: int = ANN_NPROBE) -> np.ndarray:
+        """
+        Return the rows that live in the nprobe clusters closest to the query.
+
+        Args:
+            query (np.ndarray): Query embedding
+            nprobe (int): Number of clusters to scan
+
+        Returns:
+            np.ndarray: Row indices into the resident matrix
+        """
+        scores = self.centroids @ query
+        nprobe = min(nprobe, len(scores))
+        probe = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        return np.flatnonzero(np.isin(self.lists, probe))
+
+    def save(self, ids: np.ndarray):
+        """Persist centroids and memory -> cluster assignments next to the database."""
+        _save_npy(CENTROIDS_PATH, np.asarray(self.centroids))
+        self._save_assignments(ids)
+
+    def close(self, ids: np.ndarray):
+        """
+        Write assignments of memories added since the last save.
+
+        Args:
+            ids (np.ndarray): Memory ids aligned with the index rows
+        """
+        if self.dirty and self.trained:
+            self._save_assignments(ids)
+
+    def _save_assignments(self, ids: np.ndarray):
+        _save_npy(ASSIGNMENTS_PATH, np.stack([ids, self.lists.astype(np.int64)], axis=1))
+        self.dirty = False
@@ -0,0 +1,141 @@
+# Call Accounting
+# Objective: Know where each cycle's time and tokens go. Every LLM and embedding call is recorded in
+# the llm_calls table with its engine, provider, model, token usage, latency, retries and outcome,
+# and the report below summarises latency percentiles and token spend per engine per day.
+
+# Settings:
+# LLM_CALL_ACCOUNTING  record calls in the llm_calls table (default true)
+
+# Usage:
+# python -m engines.call_accounting [--days 7]
+
+import os
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func
+from models import LLMCall
+from db.db_setup import SessionLocal
+
+LLM_CALL_ACCOUNTING = os.getenv("LLM_CALL_ACCOUNTING", "true").lower() == "true"
+
+
+def record_call(
+    engine: str,
+    kind: str,
+    provider: str,
+    model: str,
+    latency: float,
+    outcome: str,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+    retries: int = 0,
+):
+    """
+    Record one LLM or embedding call. Accounting never interrupts the call it describes:
+    failures to write are logged and ignored.
+
+    Args:
+        engine (str): Name of the calling engine
+        kind (str): chat, completion, stream or embedding
+        provider (str): Provider name
+        model (str): Model name at the provider
+        latency (float): Seconds the caller waited, including retries
+        outcome (str): ok, cached, cancelled or error
+        prompt_tokens (Optional[int]): Prompt tokens reported by the provider
+        completion_tokens (Optional[int]): Completion tokens reported by the provider
+        retries (int): Attempts beyond the first
+    """
+    if not LLM_CALL_ACCOUNTING:
+        return
+    try:
+        with SessionLocal() as session:
+            session.add(LLMCall(
+                engine=engine,
+                kind=kind,
+                provider=provider,
+                model=model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                latency=latency,
+                retries=retries,
+                outcome=outcome,
+            ))
+            session.commit()
+    except Exception as e:
+        print(f"Failed to record {engine} call: {e}")
+
+
+def summarize_calls(days: int = 7) -> List[Dict]:
+    """
+    Summarise recorded calls per day and engine.
+
+    Args:
+        days (int): Number of days back to include
+
+    Returns:
+        List[Dict]: One row per (day, engine) with call and error counts, p50/p95 latency in
+            seconds, token totals and retries
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    with SessionLocal() as session:
+        rows = (
+            session.query(
+                func.date(LLMCall.created_at),
+                LLMCall.engine,
+                LLMCall.latency,
+                LLMCall.prompt_tokens,
+                LLMCall.completion_tokens,
+                LLMCall.retries,
+                LLMCall.outcome,
+            )
+            .filter(LLMCall.created_at >= since)
+            .all()
+        )
+
+    groups: Dict[Tuple[str, str], List] = defaultdict(list)
+    for day, engine, *values in rows:
+        groups[(str(day), engine)].append(values)
+
+    summary = []
+    for (day, engine), calls in sorted(groups.items()):
+        latencies = np.array([latency for latency, *_ in calls])
+        summary.append({
+            "day": day,
+            "engine": engine,
+            "calls": len(calls),
+            "errors": sum(1 for *_, outcome in calls if outcome == "error"),
+            "p50_latency": float(np.percentile(latencies, 50)),
+            "p95_latency": float(np.percentile(latencies, 95)),
+            "prompt_tokens": sum(prompt or 0 for _, prompt, *_ in calls),
+            "completion_tokens": sum(completion or 0 for _, _, completion, *_ in calls),
+            "retries": sum(retries for *_, retries, _ in calls),
+        })
+    return summary
+
+
+def print_report(days: int = 7):
+    """Print the per-day, per-engine summary as a table."""
+    summary = summarize_calls(days)
+    if not summary:
+        print(f"No LLM calls recorded in the last {days} days.")
+        return
+
+    header = f"{'day':<10}  {'engine':<20}  {'calls':>6}  {'errors':>6}  {'p50 s':>7}  {'p95 s':>7}  {'prompt tok':>10}  {'compl tok':>10}  {'retries':>7}"
+    print(header)
+    print("-" * len(header))
+    for row in summary:
+        print(
+            f"{row['day']:<10}  {row['engine']:<20}  {row['calls']:>6}  {row['errors']:>6}  "
+            f"{row['p50_latency']:>7.2f}  {row['p95_latency']:>7.2f}  "
+            f"{row['prompt_tokens']:>10}  {row['completion_tokens']:>10}  {row['retries']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise LLM and embedding calls per engine per day")
+    parser.add_argument("--days", type=int, default=7, help="number of days back to include")
+    args = parser.parse_args()
+    print_report(args.days)
@@ -0,0 +1,172 @@
+# Embedding Backends
+# Objective: Decouple memory embeddings from a single provider. The OpenAI backend is the default;
+# the hashing backend runs entirely on the local CPU so the pipeline can embed offline and without
+# a network round trip.
+
+# Settings:
+# EMBEDDING_BACKEND      "openai" (default) or "hashing"
+# EMBEDDING_DIMENSIONS   output dimension requested from the openai backend, up to 1536 (default 1536)
+# EMBEDDING_HASHING_DIM  output dimension of the hashing backend (default 512)
+
+# Every stored memory records the backend name and dimension it was embedded with, and retrieval
+# only compares memories that share the active backend's name. OpenAI embedding requests are
+# recorded by call accounting under the "embedding" engine.
+
+import os
+import re
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import List, Dict
+import numpy as np
+from openai import OpenAI
+from engines.call_accounting import record_call
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "1536"))
+EMBEDDING_HASHING_DIM = int(os.getenv("EMBEDDING_HASHING_DIM", "512"))
+
+
+class EmbeddingBackend(ABC):
+    """Interface implemented by every embedding backend."""
+
+    # Stored with each memory and used as the embedding cache namespace
+    name: str
+    dim: int
+    # Maximum number of texts sent to embed() in one call
+    batch_size: int = 2048
+
+    @property
+    def cache_namespace(self) -> str:
+        """Embedding cache namespace, distinct for every (backend, dimension) pair."""
+        return f"{self.name}/{self.dim}"
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a batch of texts.
+
+        Args:
+            texts (List[str]): Texts to embed, at most batch_size of them
+
+        Returns:
+            List[List[float]]: One embedding per text, in order
+        """
+
+
+_openai_clients: Dict[str, OpenAI] = {}
+
+def get_openai_client(openai_api_key: str) -> OpenAI:
+    """Return a shared OpenAI client per API key so connections are pooled across calls."""
+    client = _openai_clients.get(openai_api_key)
+    if client is None:
+        client = OpenAI(api_key=openai_api_key)
+        _openai_clients[openai_api_key] = client
+    return client
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """
+    OpenAI text-embedding-3-small over the network.
+
+    Shortened vectors are requested with the `dimensions` parameter. They share the model name
+    with full-size vectors, since a renormalized prefix of a full vector is directly comparable.
+    """
+
+    name = "text-embedding-3-small"
+    max_dim = 1536
+    # OpenAI accepts at most 2048 inputs per embeddings request
+    batch_size = 2048
+
+    def __init__(self, openai_api_key: str, dim: int = EMBEDDING_DIMENSIONS):
+        if not 0 < dim <= self.max_dim:
+            raise ValueError(f"EMBEDDING_DIMENSIONS must be between 1 and {self.max_dim}, got {dim}")
+        self.openai_api_key = openai_api_key
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        request = {"input": texts, "model": self.name}
+        if self.dim != self.max_dim:
+            request["dimensions"] = self.dim
+        started = time.monotonic()
+        try:
+            response = get_openai_client(self.openai_api_key).embeddings.create(**request)
+        except Exception:
+            record_call("embedding", "embedding", "openai", self.name, time.monotonic() - started, "error")
+            raise
+        usage = getattr(response, "usage", None)
+        record_call(
+            "embedding", "embedding", "openai", self.name, time.monotonic() - started, "ok",
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+        )
+        embeddings = [None] * len(texts)
+        for item in response.data:
+            embeddings[item.index] = item.embedding
+        return embeddings
+
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    Local feature-hashing embedding over word unigrams and character 3-5 grams.
+
+    Each feature is hashed with a fixed CRC32 into one of `dim` signed buckets, counts are
+    log-scaled and the vector is L2-normalised, so cosine similarity behaves like TF-IDF
+    overlap without needing a fitted vocabulary.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing-ngram-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        text = text.lower()
+        features = [f"w:{token}" for token in _TOKEN_PATTERN.findall(text)]
+        padded = f" {' '.join(_TOKEN_PATTERN.findall(text))} "
+        for n in (3, 4, 5):
+            features.extend(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+        return features
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for text in texts:
+            vector = np.zeros(self.dim, dtype=np.float32)
+            for feature in self._features(text):
+                digest = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                vector[digest % self.dim] += sign
+            vector = np.sign(vector) * np.log1p(np.abs(vector))
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector /= norm
+            embeddings.append(vector.tolist())
+        return embeddings
+
+
+def get_embedding_backend(openai_api_key: str = None) -> EmbeddingBackend:
+    """
+    Return the backend selected by EMBEDDING_BACKEND.
+
+    Args:
+        openai_api_key (str): OpenAI API key, only used by the openai backend
+
+    Returns:
+        EmbeddingBackend: The active embedding backend
+    """
+    if EMBEDDING_BACKEND == "hashing":
+        return HashingEmbeddingBackend()
+    if EMBEDDING_BACKEND == "openai":
+        return OpenAIEmbeddingBackend(openai_api_key)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {EMBEDDING_BACKEND}")
+
+
+def get_embedding_model_name() -> str:
+    """Return the name stored with memories embedded by the active backend."""
+    return get_embedding_backend().name
+
+
+def get_embedding_dim() -> int:
+    """Return the dimension of embeddings produced by the active backend."""
+    return get_embedding_backend().dim
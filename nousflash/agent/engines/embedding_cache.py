@@ -0,0 +1,84 @@
+# Embedding Cache
+# Objective: Never pay for the same embedding twice. Embeddings are content-addressed by a hash of
+# (model, text) and kept in the embedding_cache table with least-recently-used eviction.
+
+# Settings:
+# EMBEDDING_CACHE_MAX_ENTRIES  rows kept before the least recently used are evicted (default 10000)
+
+import os
+import time
+import hashlib
+from typing import List, Optional
+from models import EmbeddingCache
+from db.db_setup import SessionLocal
+from db.vectors import pack_embedding, unpack_embedding
+
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000"))
+
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def cache_key(model: str, text: str) -> str:
+    """Return the content address of an embedding."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def get_cached_embedding(model: str, text: str) -> Optional[List[float]]:
+    """
+    Look up an embedding, refreshing its position in the LRU order on a hit.
+
+    Args:
+        model (str): Embedding model name
+        text (str): Embedded text
+
+    Returns:
+        Optional[List[float]]: Cached embedding, or None on a miss
+    """
+    with SessionLocal() as session:
+        entry = session.get(EmbeddingCache, cache_key(model, text))
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+
+        entry.last_used_at = time.time()
+        session.commit()
+        _stats["hits"] += 1
+        return unpack_embedding(entry.embedding).tolist()
+
+
+def put_cached_embedding(model: str, text: str, embedding: List[float]):
+    """
+    Store an embedding and evict the least recently used entries over the size budget.
+
+    Args:
+        model (str): Embedding model name
+        text (str): Embedded text
+        embedding (List[float]): Embedding vector
+    """
+    with SessionLocal() as session:
+        session.merge(EmbeddingCache(
+            key=cache_key(model, text),
+            model=model,
+            embedding=pack_embedding(embedding),
+            last_used_at=time.time(),
+        ))
+        session.commit()
+
+        overflow = session.query(EmbeddingCache).count() - EMBEDDING_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            stale_keys = (
+                session.query(EmbeddingCache.key)
+                .order_by(EmbeddingCache.last_used_at.asc())
+                .limit(overflow)
+            )
+            session.query(EmbeddingCache).filter(
+                EmbeddingCache.key.in_(stale_keys.scalar_subquery())
+            ).delete(synchronize_session=False)
+            session.commit()
+            _stats["evictions"] += overflow
+
+
+def get_cache_stats() -> dict:
+    """Return hit, miss and eviction counters for this process."""
+    lookups = _stats["hits"] + _stats["misses"]
+    return {**_stats, "hit_rate": _stats["hits"] / lookups if lookups else 0.0}
@@ -0,0 +1,111 @@
+# Example Selector
+# Objective: Shrink the tweet prompt by sending only the example tweets most relevant to what the agent
+# is currently thinking about, instead of the whole example list on every 405B completion.
+
+# Inputs:
+# Example tweets from engines/prompts.py and db/examples*.txt
+# Embedding of the current short-term memory
+
+# Outputs:
+# Example tweets block for the tweet prompt
+
+# Settings:
+# TWEET_EXAMPLES_TOP_K  examples selected per cycle; 0 sends the full static list (default 0)
+
+# Examples are embedded once per process with the active embedding backend, through the embedding
+# cache, so after the first run building the index costs no embedding requests. A selected block
+# changes every cycle, which gives up provider-side caching of the example prefix in exchange for a
+# much shorter prompt.
+
+import os
+import glob
+from typing import List
+import numpy as np
+from engines.prompts import EXAMPLE_TWEETS
+from engines.long_term_mem import create_embeddings
+from engines.embedding_backends import get_embedding_model_name
+
+TWEET_EXAMPLES_TOP_K = int(os.getenv("TWEET_EXAMPLES_TOP_K", "0"))
+
+EXAMPLE_FILES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "examples*.txt")
+
+
+def load_example_texts() -> List[str]:
+    """
+    Collect example tweets from the built-in list and the db/examples*.txt files.
+
+    The files hold one example per paragraph, some wrapped in quotes with a trailing comma.
+
+    Returns:
+        List[str]: Distinct example tweets
+    """
+    examples = list(EXAMPLE_TWEETS)
+    for path in sorted(glob.glob(EXAMPLE_FILES)):
+        with open(path, encoding="utf-8") as f:
+            paragraphs = f.read().split("\n\n")
+        for paragraph in paragraphs:
+            text = paragraph.strip().rstrip(",").strip()
+            if len(text) >= 2 and text[0] == '"' and text[-1] == '"':
+                text = text[1:-1].strip()
+            if text:
+                examples.append(text)
+    return list(dict.fromkeys(examples))
+
+
+class ExampleIndex:
+    """Normalised embedding matrix over the example tweets."""
+
+    def __init__(self, examples: List[str], embeddings: List[List[float]], embedding_model: str):
+        self.examples = examples
+        self.embedding_model = embedding_model
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        self.matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+    def select(self, query_embedding: List[float], k: int) -> List[str]:
+        """
+        Return the k examples most similar to the query, the most similar last so it sits
+        closest to where the model starts writing.
+
+        Args:
+            query_embedding (List[float]): Embedding of the current short-term memory
+            k (int): Number of examples
+
+        Returns:
+            List[str]: Selected examples
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        similarities = self.matrix @ query
+        k = min(k, len(self.examples))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(similarities[top])]
+        return [self.examples[i] for i in top]
+
+
+_example_index: ExampleIndex = None
+
+
+def get_example_index(openai_api_key: str) -> ExampleIndex:
+    """Return the example index, building it on first use or when the embedding backend changed."""
+    global _example_index
+    embedding_model = get_embedding_model_name()
+    if _example_index is None or _example_index.embedding_model != embedding_model:
+        examples = load_example_texts()
+        _example_index = ExampleIndex(examples, create_embeddings(examples, openai_api_key), embedding_model)
+        print(f"Indexed {len(examples)} example tweets for few-shot selection.")
+    return _example_index
+
+
+def select_example_tweets(query_embedding: List[float], openai_api_key: str, k: int = TWEET_EXAMPLES_TOP_K) -> str:
+    """
+    Build the example tweets block from the k examples most relevant to the query.
+
+    Args:
+        query_embedding (List[float]): Embedding of the current short-term memory
+        openai_api_key (str): OpenAI API key, used by the openai embedding backend
+        k (int): Number of examples
+
+    Returns:
+        str: Selected examples in the same format as the full example block
+    """
+    return "\n--\n".join(get_example_index(openai_api_key).select(query_embedding, k))
@@ -1,8 +1,14 @@
-import requests
 import re
+import json
 from twitter.account import Account
 from twitter.scraper import Scraper
 from models import User
+from engines.llm_client import chat_completion
+from engines.model_cascade import cascade
+
+# Highest score a small model may give anyone for its decision to stand. Anything above is
+# escalated, so only the large model can decide to follow someone.
+SMALL_MODEL_MAX_FOLLOW_SCORE = 0.5
 
 def decide_to_follow_users(db, posts, openrouter_api_key: str):
     """
@@ -76,24 +82,36 @@ def decide_to_follow_users(db, posts, openrouter_api_key: str):
     []
     """
 
+    def ask(model: str) -> str:
+        return chat_completion(
+            "openrouter",
+            openrouter_api_key,
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            engine="follow_user",
+            temperature=0.7,
+        )
+
+    def no_new_usernames():
+        # Only new usernames are offered, so with none there is nobody to follow
+        return "[]" if not twitter_usernames else None
+
+    def small_model_declines(model: str):
+        content = ask(model)
+        decisions = json.loads(content)
+        if all(decision["score"] <= SMALL_MODEL_MAX_FOLLOW_SCORE for decision in decisions):
+            return content
+        return None
+
     # Send the prompt to the AI model
-    response = requests.post(
-        url="https://openrouter.ai/api/v1/chat/completions",
-        headers={
-            "Authorization": f"Bearer {openrouter_api_key}",
-        },
-        json={
-            "model": "meta-llama/llama-3.1-70b-instruct",
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.7,
-        },
+    return cascade(
+        "follow_user",
+        "openrouter",
+        lambda: ask("meta-llama/llama-3.1-70b-instruct"),
+        heuristic=no_new_usernames,
+        small=small_model_declines,
     )
 
-    if response.status_code == 200:
-        return response.json()["choices"][0]["message"]["content"]
-    else:
-        raise Exception(f"Error generating decision: {response.text}")
-
 
 def get_user_id(account: Account, username):
     scraper = Scraper(account.session.cookies)
@@ -0,0 +1,139 @@
+# Request Hedging
+# Objective: Cut tail latency of side-effect-free LLM calls. Once a request has taken longer than the
+# learned p95 latency for its provider and model, a second identical request is sent; whichever
+# answers first is used and the other is cancelled.
+
+# Settings:
+# LLM_HEDGE_ENGINES        comma-separated engine names to hedge, e.g. "short_term_mem,significance_scorer" (default none)
+# LLM_HEDGE_INITIAL_DELAY  seconds before hedging while too few latencies have been observed (default 10)
+# LLM_HEDGE_MIN_SAMPLES    latencies observed before the learned p95 is used (default 20)
+# LLM_HEDGE_WINDOW         most recent latencies kept per provider and model (default 200)
+
+# Latencies are recorded per successful request attempt by the LLM client, so retries and backoff
+# sleeps after a 429 or 5xx do not inflate the hedge delay.
+
+# Only hedge engines whose requests have no side effects: a hedged request is sent twice and can
+# be billed twice. The losing request stops before its next retry; an attempt already in flight
+# runs to completion and its response is discarded.
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Deque, Dict, Optional, TypeVar
+import numpy as np
+
+LLM_HEDGE_ENGINES = {
+    engine.strip() for engine in os.getenv("LLM_HEDGE_ENGINES", "").split(",") if engine.strip()
+}
+LLM_HEDGE_INITIAL_DELAY = float(os.getenv("LLM_HEDGE_INITIAL_DELAY", "10"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "200"))
+
+T = TypeVar("T")
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+
+_latencies: Dict[str, Deque[float]] = {}
+_lock = threading.Lock()
+
+_stats = {"calls": 0, "hedges_fired": 0, "hedge_wins": 0}
+
+
+def is_hedging_enabled(engine: str) -> bool:
+    """Return True if requests from this engine should be hedged."""
+    return engine in LLM_HEDGE_ENGINES
+
+
+def record_latency(key: str, seconds: float):
+    """Add an observed latency to the rolling window of a provider and model."""
+    with _lock:
+        window = _latencies.get(key)
+        if window is None:
+            window = deque(maxlen=LLM_HEDGE_WINDOW)
+            _latencies[key] = window
+        window.append(seconds)
+
+
+def hedge_delay(key: str) -> float:
+    """
+    Return how long to wait for the first request before hedging.
+
+    Args:
+        key (str): Provider and model the request goes to
+
+    Returns:
+        float: The p95 of recent latencies, or LLM_HEDGE_INITIAL_DELAY while there are too few
+    """
+    with _lock:
+        window = _latencies.get(key)
+        if window is None or len(window) < LLM_HEDGE_MIN_SAMPLES:
+            return LLM_HEDGE_INITIAL_DELAY
+        return float(np.percentile(window, 95))
+
+
+def hedged_call(
+    key: str,
+    engine: str,
+    call: Callable[[threading.Event], T],
+    hedge: Optional[Callable[[threading.Event], T]] = None,
+) -> T:
+    """
+    Run a call, and run it a second time if it has not finished within the hedge delay.
+
+    Args:
+        key (str): Provider and model the request goes to, whose latencies set the hedge delay
+        engine (str): Name of the calling engine, used in log messages
+        call (Callable[[threading.Event], T]): Performs the request; it should stop retrying once
+            the event passed to it is set
+        hedge (Optional[Callable[[threading.Event], T]]): Alternate call used for the hedge,
+            e.g. the same request to another provider; defaults to repeating call
+
+    Returns:
+        T: Result of whichever call succeeded first
+    """
+    cancelled = threading.Event()
+    delay = hedge_delay(key)
+
+    primary = _executor.submit(call, cancelled)
+    futures = [primary]
+    with _lock:
+        _stats["calls"] += 1
+
+    done, _ = wait(futures, timeout=delay)
+    if not done:
+        print(f"[{engine}] no response after {delay:.2f}s, sending hedge request")
+        with _lock:
+            _stats["hedges_fired"] += 1
+        futures.append(_executor.submit(hedge or call, cancelled))
+
+    pending = set(futures)
+    last_error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                result = future.result()
+            except Exception as e:
+                last_error = e
+                continue
+
+            cancelled.set()
+            for other in pending:
+                other.cancel()
+            if future is not primary:
+                print(f"[{engine}] hedge request won")
+                with _lock:
+                    _stats["hedge_wins"] += 1
+            return result
+
+    raise last_error
+
+
+def get_hedge_stats() -> dict:
+    """Return how often hedges were sent and how often they answered first, for this process."""
+    with _lock:
+        stats = dict(_stats)
+    stats["hedge_rate"] = stats["hedges_fired"] / stats["calls"] if stats["calls"] else 0.0
+    stats["hedge_win_rate"] = stats["hedge_wins"] / stats["hedges_fired"] if stats["hedges_fired"] else 0.0
+    return stats
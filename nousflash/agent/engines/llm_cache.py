@@ -0,0 +1,148 @@
+# LLM Response Cache
+# Objective: Don't pay twice for an identical decision. Retries and restarts of the pipeline often resend
+# byte-identical prompts, so engines that opt in have their responses content-addressed by a hash of
+# (endpoint, model, sampling params, prompt) and kept in the llm_response_cache table.
+
+# Settings:
+# LLM_CACHE_ENGINES      comma-separated engine names to cache, e.g. "short_term_mem,significance_scorer" (default none)
+# LLM_CACHE_TTL_SECONDS  age after which a cached response is treated as a miss (default 3600)
+# LLM_CACHE_MAX_ENTRIES  rows kept before the least recently used are evicted (default 2000)
+
+# Caching is opt-in per engine because sampled responses are not deterministic: a hit replays the
+# earlier sample instead of drawing a new one. Empty responses are never stored, and engines that
+# retry an unusable answer bypass the cache on the retry so they draw a new sample.
+
+import os
+import json
+import time
+import hashlib
+from typing import Optional
+from models import LLMResponseCache
+from db.db_setup import SessionLocal
+
+LLM_CACHE_ENGINES = {
+    engine.strip() for engine in os.getenv("LLM_CACHE_ENGINES", "").split(",") if engine.strip()
+}
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+
+_stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+
+def is_cache_enabled(engine: str) -> bool:
+    """Return True if responses for this engine should be cached."""
+    return engine in LLM_CACHE_ENGINES
+
+
+def response_cache_key(url: str, payload: dict) -> str:
+    """
+    Return the content address of a request.
+
+    The payload carries the model, sampling params and prompt or messages; it is serialised with
+    sorted keys so that parameter order does not change the key.
+
+    Args:
+        url (str): Endpoint URL
+        payload (dict): Request body
+
+    Returns:
+        str: sha256 hex digest
+    """
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(f"{url}\0{canonical}".encode("utf-8")).hexdigest()
+
+
+def is_cacheable_response(response: dict) -> bool:
+    """
+    Return True if a response is worth replaying: it has choices and none of them is empty.
+
+    Engines retry empty or unusable answers with the same payload, so caching one would have
+    every retry, and every repeat of the prompt within the TTL, replay it.
+
+    Args:
+        response (dict): Decoded response body
+
+    Returns:
+        bool: Whether the response may be stored
+    """
+    choices = response.get("choices") if isinstance(response, dict) else None
+    if not choices:
+        return False
+    for choice in choices:
+        text = choice.get("text") if "text" in choice else (choice.get("message") or {}).get("content")
+        if not isinstance(text, str) or not text.strip():
+            return False
+    return True
+
+
+def get_cached_response(key: str) -> Optional[dict]:
+    """
+    Look up a response, refreshing its position in the LRU order on a hit.
+
+    Args:
+        key (str): Key from response_cache_key
+
+    Returns:
+        Optional[dict]: Cached response body, or None on a miss or an expired entry
+    """
+    with SessionLocal() as session:
+        entry = session.get(LLMResponseCache, key)
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+
+        now = time.time()
+        if now - entry.created_at > LLM_CACHE_TTL_SECONDS:
+            session.delete(entry)
+            session.commit()
+            _stats["expired"] += 1
+            _stats["misses"] += 1
+            return None
+
+        entry.last_used_at = now
+        session.commit()
+        _stats["hits"] += 1
+        return json.loads(entry.response)
+
+
+def put_cached_response(key: str, engine: str, response: dict):
+    """
+    Store a response, dropping expired entries and evicting the least recently used over the size budget.
+
+    Args:
+        key (str): Key from response_cache_key
+        engine (str): Name of the engine that made the request
+        response (dict): Decoded response body
+    """
+    now = time.time()
+    with SessionLocal() as session:
+        session.merge(LLMResponseCache(
+            key=key,
+            engine=engine,
+            response=json.dumps(response),
+            created_at=now,
+            last_used_at=now,
+        ))
+        session.query(LLMResponseCache).filter(
+            LLMResponseCache.created_at < now - LLM_CACHE_TTL_SECONDS
+        ).delete(synchronize_session=False)
+        session.commit()
+
+        overflow = session.query(LLMResponseCache).count() - LLM_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            stale_keys = (
+                session.query(LLMResponseCache.key)
+                .order_by(LLMResponseCache.last_used_at.asc())
+                .limit(overflow)
+            )
+            session.query(LLMResponseCache).filter(
+                LLMResponseCache.key.in_(stale_keys.scalar_subquery())
+            ).delete(synchronize_session=False)
+            session.commit()
+            _stats["evictions"] += overflow
+
+
+def get_llm_cache_stats() -> dict:
+    """Return hit, miss, expiry and eviction counters for this process."""
+    lookups = _stats["hits"] + _stats["misses"]
+    return {**_stats, "hit_rate": _stats["hits"] / lookups if lookups else 0.0}
@@ -0,0 +1,541 @@
+# LLM Client
+# Objective: One place for every chat/completion request the engines make. Each provider gets a
+# keep-alive requests.Session with its own connection pool, so the TLS handshake is paid once per
+# process instead of once per call, and every request has connect/read timeouts and the same
+# retry behaviour. Requests wait on the provider's rate limiter and failed attempts back off with
+# jitter (see engines/rate_limiter.py).
+
+# Settings:
+# LLM_CONNECT_TIMEOUT  seconds to establish a connection (default 10)
+# LLM_READ_TIMEOUT     seconds to wait for response data (default 120)
+# LLM_MAX_RETRIES      attempts per request before giving up (default 3)
+
+# Engines listed in LLM_CACHE_ENGINES have their responses served from the response cache
+# (see engines/llm_cache.py) when an identical request was made within the TTL, and requests from
+# engines listed in LLM_HEDGE_ENGINES are hedged against tail latency (see engines/hedging.py).
+# Models served by more than one provider are routed to the fastest healthy one, failing over
+# between them (see engines/llm_router.py). Every call is recorded with its token usage, latency,
+# retries and outcome (see engines/call_accounting.py).
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import requests
+from requests.adapters import HTTPAdapter
+from engines.rate_limiter import get_limiter, estimate_tokens, parse_retry_after, backoff_delay
+from engines.llm_router import routed_call
+from engines.hedging import is_hedging_enabled, hedged_call, record_latency
+from engines.llm_cache import (
+    is_cache_enabled,
+    is_cacheable_response,
+    response_cache_key,
+    get_cached_response,
+    put_cached_response,
+)
+from engines.call_accounting import record_call
+
+PROVIDERS = {
+    "hyperbolic": "https://api.hyperbolic.xyz/v1",
+    "openrouter": "https://openrouter.ai/api/v1",
+}
+
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "120"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+
+_POOL_SIZE = 8
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+class LLMError(Exception):
+    """Raised when a provider request still fails after all retries."""
+
+
+def get_session(provider: str) -> requests.Session:
+    """
+    Return the shared keep-alive session for a provider, creating it on first use.
+
+    Args:
+        provider (str): Provider name, a key of PROVIDERS
+
+    Returns:
+        requests.Session: Session with a pooled HTTPS adapter
+    """
+    with _sessions_lock:
+        session = _sessions.get(provider)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.headers.update({"Content-Type": "application/json"})
+            _sessions[provider] = session
+        return session
+
+
+def usage_tokens(data: dict) -> Optional[int]:
+    """Return the total tokens reported in a response's usage block, if any."""
+    usage = data.get("usage") or {}
+    if "total_tokens" in usage:
+        return usage["total_tokens"]
+    if "prompt_tokens" in usage or "completion_tokens" in usage:
+        return usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+    return None
+
+
+def has_choices(data) -> bool:
+    """Return True if a decoded response body carries at least one choice."""
+    return isinstance(data, dict) and isinstance(data.get("choices"), list) and len(data["choices"]) > 0
+
+
+def call_kind(url: str) -> str:
+    """Return the kind of call an endpoint makes, as recorded by call accounting."""
+    return "chat" if url.endswith("/chat/completions") else "completion"
+
+
+def _send(
+    provider: str,
+    api_key: str,
+    url: str,
+    payload: dict,
+    engine: str,
+    max_retries: int,
+    cancelled: Optional[threading.Event] = None,
+    record_calls: bool = True,
+) -> Tuple[dict, int]:
+    """
+    Send one request through the provider's rate limiter, retrying with backoff, and return the
+    response with the number of retries it took. With record_calls unset the caller records the call.
+    """
+    session = get_session(provider)
+    limiter = get_limiter(provider)
+    estimated_tokens = estimate_tokens(payload)
+    last_error = None
+    started = time.monotonic()
+
+    def record(outcome: str, retries: int, usage: Optional[dict] = None):
+        if not record_calls:
+            return
+        usage = usage or {}
+        record_call(
+            engine,
+            call_kind(url),
+            provider,
+            payload.get("model"),
+            time.monotonic() - started,
+            outcome,
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            retries=retries,
+        )
+
+    for attempt in range(1, max_retries + 1):
+        if cancelled is not None and cancelled.is_set():
+            record("cancelled", attempt - 1)
+            raise LLMError(f"[{engine}] {provider} request cancelled after a hedged request answered")
+        limiter.acquire(estimated_tokens)
+        retry_after = None
+        attempt_started = time.monotonic()
+        try:
+            response = session.post(
+                url,
+                headers={"Authorization": f"Bearer {api_key}"},
+                json=payload,
+                timeout=(LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT),
+            )
+            if response.status_code == 200:
+                data = response.json()
+                if has_choices(data):
+                    if is_hedging_enabled(engine):
+                        # The hedge delay is learned from single attempts, without retries or backoff
+                        record_latency(f"{provider}/{payload.get('model')}", time.monotonic() - attempt_started)
+                    limiter.settle(estimated_tokens, usage_tokens(data))
+                    record("ok", attempt - 1, data.get("usage"))
+                    return data, attempt - 1
+                # Providers report some failures, e.g. an overloaded model, as a 200 with an error body
+                last_error = f"response without choices: {response.text}"
+            else:
+                last_error = f"status {response.status_code}: {response.text}"
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None:
+                    limiter.pause(retry_after)
+        except (requests.RequestException, ValueError) as e:
+            last_error = str(e)
+
+        print(f"[{engine}] {provider} attempt {attempt} failed: {last_error}")
+        if attempt < max_retries:
+            time.sleep(backoff_delay(attempt, retry_after))
+
+    record("error", max_retries - 1)
+    raise LLMError(f"[{engine}] {provider} request failed after {max_retries} attempts: {last_error}")
+
+
+def post_json(
+    provider: str,
+    api_key: str,
+    path: str,
+    payload: dict,
+    engine: str = "llm",
+    max_retries: int = LLM_MAX_RETRIES,
+    bypass_cache: bool = False,
+) -> dict:
+    """
+    POST a JSON payload to a provider endpoint, retrying transport errors, non-200 responses and
+    bodies without choices.
+    Responses for engines with caching enabled are looked up in, and stored to, the response cache,
+    and requests for engines with hedging enabled are hedged.
+
+    Args:
+        provider (str): Provider name, a key of PROVIDERS
+        api_key (str): API key for the provider
+        path (str): Endpoint path, e.g. "/chat/completions"
+        payload (dict): Request body
+        engine (str): Name of the calling engine, used in log messages
+        max_retries (int): Attempts before giving up
+        bypass_cache (bool): Skip the cache lookup, e.g. when retrying an unusable answer; a new
+            usable response still replaces the cached one
+
+    Returns:
+        dict: Decoded JSON response
+    """
+    url = f"{PROVIDERS[provider]}{path}"
+    cache_key = response_cache_key(url, payload) if is_cache_enabled(engine) else None
+    if cache_key is not None and not bypass_cache:
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            print(f"[{engine}] {provider} response served from cache")
+            record_call(engine, call_kind(url), provider, payload.get("model"), 0.0, "cached")
+            return cached
+
+    if is_hedging_enabled(engine):
+        # A hedged request is accounted once, with the time the caller waited; the attempt that
+        # lost the race is not a completed call
+        started = time.monotonic()
+        try:
+            data, retries = hedged_call(
+                f"{provider}/{payload.get('model')}",
+                engine,
+                lambda cancelled: _send(provider, api_key, url, payload, engine, max_retries, cancelled, record_calls=False),
+            )
+        except LLMError:
+            record_call(
+                engine, call_kind(url), provider, payload.get("model"), time.monotonic() - started, "error",
+                retries=max_retries - 1,
+            )
+            raise
+        usage = data.get("usage") or {}
+        record_call(
+            engine,
+            call_kind(url),
+            provider,
+            payload.get("model"),
+            time.monotonic() - started,
+            "ok",
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            retries=retries,
+        )
+    else:
+        data, _ = _send(provider, api_key, url, payload, engine, max_retries)
+
+    if cache_key is not None and is_cacheable_response(data):
+        put_cached_response(cache_key, engine, data)
+    return data
+
+
+def chat_completion(
+    provider: str,
+    api_key: str,
+    model: str,
+    messages: List[Dict],
+    engine: str = "llm",
+    max_retries: int = LLM_MAX_RETRIES,
+    bypass_cache: bool = False,
+    **params,
+) -> str:
+    """
+    Run a chat completion and return the assistant message content.
+
+    Args:
+        provider (str): Provider name, a key of PROVIDERS
+        api_key (str): API key for the provider
+        model (str): Model name as the provider knows it
+        messages (List[Dict]): Chat messages
+        engine (str): Name of the calling engine, used in log messages
+        max_retries (int): Attempts before giving up
+        bypass_cache (bool): Skip the response cache lookup, see post_json
+        **params: Sampling parameters such as temperature, top_p, max_tokens
+
+    Returns:
+        str: Content of the first choice
+    """
+    def send(provider: str, api_key: str, model: str, max_retries: int) -> str:
+        data = post_json(
+            provider,
+            api_key,
+            "/chat/completions",
+            {"model": model, "messages": messages, **params},
+            engine=engine,
+            max_retries=max_retries,
+            bypass_cache=bypass_cache,
+        )
+        return data["choices"][0]["message"]["content"]
+
+    return routed_call(provider, api_key, model, engine, max_retries, send)
+
+
+def completion(
+    provider: str,
+    api_key: str,
+    model: str,
+    prompt: str,
+    engine: str = "llm",
+    max_retries: int = LLM_MAX_RETRIES,
+    bypass_cache: bool = False,
+    with_finish_reason: bool = False,
+    **params,
+) -> Union[str, Tuple[str, Optional[str]]]:
+    """
+    Run a raw text completion (base models) and return the generated text.
+
+    Args:
+        provider (str): Provider name, a key of PROVIDERS
+        api_key (str): API key for the provider
+        model (str): Model name as the provider knows it
+        prompt (str): Prompt to complete
+        engine (str): Name of the calling engine, used in log messages
+        max_retries (int): Attempts before giving up
+        bypass_cache (bool): Skip the response cache lookup, see post_json
+        with_finish_reason (bool): Also return the choice's finish reason, e.g. "length" when
+            the text was cut off by max_tokens
+        **params: Sampling parameters such as temperature, top_p, max_tokens, stop
+
+    Returns:
+        Union[str, Tuple[str, Optional[str]]]: Text of the first choice, paired with its finish
+            reason if with_finish_reason is set
+    """
+    def send(provider: str, api_key: str, model: str, max_retries: int):
+        data = post_json(
+            provider,
+            api_key,
+            "/completions",
+            {"model": model, "prompt": prompt, **params},
+            engine=engine,
+            max_retries=max_retries,
+            bypass_cache=bypass_cache,
+        )
+        choice = data["choices"][0]
+        return (choice["text"], choice.get("finish_reason")) if with_finish_reason else choice["text"]
+
+    return routed_call(provider, api_key, model, engine, max_retries, send)
+
+
+def completions(
+    provider: str,
+    api_key: str,
+    model: str,
+    prompt: str,
+    n: int,
+    engine: str = "llm",
+    max_retries: int = LLM_MAX_RETRIES,
+    bypass_cache: bool = False,
+    with_finish_reason: bool = False,
+    **params,
+) -> Union[List[str], List[Tuple[str, Optional[str]]]]:
+    """
+    Sample n raw text completions of one prompt.
+
+    All n are requested in a single call with the `n` parameter; if the provider returns fewer
+    choices, the rest are sampled with parallel single-choice requests.
+
+    Args:
+        provider (str): Provider name, a key of PROVIDERS
+        api_key (str): API key for the provider
+        model (str): Model name as the provider knows it
+        prompt (str): Prompt to complete
+        n (int): Number of completions
+        engine (str): Name of the calling engine, used in log messages
+        max_retries (int): Attempts before giving up
+        bypass_cache (bool): Skip the response cache lookup, see post_json
+        with_finish_reason (bool): Pair every text with its finish reason, see completion
+        **params: Sampling parameters such as temperature, top_p, max_tokens, stop
+
+    Returns:
+        Union[List[str], List[Tuple[str, Optional[str]]]]: Text of every choice, paired with its
+            finish reason if with_finish_reason is set
+    """
+    def send(provider: str, api_key: str, model: str, max_retries: int) -> list:
+        data = post_json(
+            provider,
+            api_key,
+            "/completions",
+            {"model": model, "prompt": prompt, "n": n, **params},
+            engine=engine,
+            max_retries=max_retries,
+            bypass_cache=bypass_cache,
+        )
+        return [
+            (choice["text"], choice.get("finish_reason")) if with_finish_reason else choice["text"]
+            for choice in data["choices"]
+        ]
+
+    texts = routed_call(provider, api_key, model, engine, max_retries, send)
+    missing = n - len(texts)
+    if missing > 0:
+        print(f"[{engine}] {provider} returned {len(texts)} of {n} choices, sampling the rest in parallel")
+        with ThreadPoolExecutor(max_workers=missing) as executor:
+            extra = executor.map(
+                lambda _: completion(
+                    provider, api_key, model, prompt, engine, max_retries, bypass_cache, with_finish_reason, **params
+                ),
+                range(missing),
+            )
+            texts.extend(extra)
+    return texts
+
+
+def stream_completion(
+    provider: str,
+    api_key: str,
+    model: str,
+    prompt: str,
+    engine: str = "llm",
+    max_retries: int = LLM_MAX_RETRIES,
+    should_stop: Optional[Callable[[str], bool]] = None,
+    with_finish_reason: bool = False,
+    **params,
+) -> Union[str, Tuple[str, Optional[str]]]:
+    """
+    Run a raw text completion as a server-sent event stream and return the generated text.
+
+    Tokens are accumulated as they arrive. As soon as should_stop returns True for the text so
+    far, the connection is closed so the provider stops generating tokens we would discard.
+    Only failures before the first token are retried; streamed responses are never cached.
+
+    Args:
+        provider (str): Provider name, a key of PROVIDERS
+        api_key (str): API key for the provider
+        model (str): Model name as the provider knows it
+        prompt (str): Prompt to complete
+        engine (str): Name of the calling engine, used in log messages
+        max_retries (int): Attempts before giving up
+        should_stop (Callable[[str], bool]): Called with the accumulated text after every token
+        with_finish_reason (bool): Also return the finish reason the provider reported, which is
+            None when the stream was stopped early or interrupted
+        **params: Sampling parameters such as temperature, top_p, max_tokens, stop
+
+    Returns:
+        Union[str, Tuple[str, Optional[str]]]: Generated text, up to the point where the stream
+            ended or was stopped, paired with its finish reason if with_finish_reason is set
+    """
+    text, finish_reason = routed_call(
+        provider,
+        api_key,
+        model,
+        engine,
+        max_retries,
+        lambda provider, api_key, model, max_retries: _stream_completion(
+            provider, api_key, model, prompt, engine, max_retries, should_stop, params
+        ),
+    )
+    return (text, finish_reason) if with_finish_reason else text
+
+
+def _stream_completion(
+    provider: str,
+    api_key: str,
+    model: str,
+    prompt: str,
+    engine: str,
+    max_retries: int,
+    should_stop: Optional[Callable[[str], bool]],
+    params: dict,
+) -> Tuple[str, Optional[str]]:
+    """Stream one completion from a single provider, returning its text and finish reason, see stream_completion."""
+    url = f"{PROVIDERS[provider]}/completions"
+    session = get_session(provider)
+    # Ask for a final usage chunk so the call is accounted with real token counts
+    payload = {"model": model, "prompt": prompt, **params, "stream": True, "stream_options": {"include_usage": True}}
+    limiter = get_limiter(provider)
+    estimated_tokens = estimate_tokens(payload)
+    last_error = None
+    call_started = time.monotonic()
+
+    for attempt in range(1, max_retries + 1):
+        limiter.acquire(estimated_tokens)
+        retry_after = None
+        started = time.monotonic()
+        first_token_at = None
+        chunks = []
+        usage = {}
+        finish_reason = None
+        stopped_early = False
+        try:
+            with session.post(
+                url,
+                headers={"Authorization": f"Bearer {api_key}"},
+                json=payload,
+                timeout=(LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT),
+                stream=True,
+            ) as response:
+                if response.status_code != 200:
+                    last_error = f"status {response.status_code}: {response.text}"
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if retry_after is not None:
+                        limiter.pause(retry_after)
+                else:
+                    for line in response.iter_lines(decode_unicode=True):
+                        if not line or not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        event = json.loads(data)
+                        usage = event.get("usage") or usage
+                        choices = event.get("choices") or []
+                        if choices:
+                            finish_reason = choices[0].get("finish_reason") or finish_reason
+                        token = choices[0].get("text", "") if choices else ""
+                        if not token:
+                            continue
+                        if first_token_at is None:
+                            first_token_at = time.monotonic()
+                        chunks.append(token)
+                        if should_stop is not None and should_stop("".join(chunks)):
+                            stopped_early = True
+                            break
+        except (requests.RequestException, ValueError) as e:
+            last_error = str(e)
+            if first_token_at is not None:
+                print(f"[{engine}] {provider} stream interrupted after {len(chunks)} chunks: {last_error}")
+                record_call(
+                    engine, "stream", provider, model, time.monotonic() - call_started, "ok",
+                    prompt_tokens=usage.get("prompt_tokens"), completion_tokens=usage.get("completion_tokens"),
+                    retries=attempt - 1,
+                )
+                return "".join(chunks), None
+
+        if first_token_at is not None or last_error is None:
+            elapsed = time.monotonic() - started
+            ttft = f"{first_token_at - started:.2f}s" if first_token_at is not None else "n/a"
+            print(
+                f"[{engine}] {provider} streamed {len(chunks)} chunks in {elapsed:.2f}s, "
+                f"time to first token {ttft}{', stopped early' if stopped_early else ''}"
+            )
+            record_call(
+                engine, "stream", provider, model, time.monotonic() - call_started, "ok",
+                prompt_tokens=usage.get("prompt_tokens"), completion_tokens=usage.get("completion_tokens"),
+                retries=attempt - 1,
+            )
+            return "".join(chunks), finish_reason
+
+        print(f"[{engine}] {provider} attempt {attempt} failed: {last_error}")
+        if attempt < max_retries:
+            time.sleep(backoff_delay(attempt, retry_after))
+
+    record_call(engine, "stream", provider, model, time.monotonic() - call_started, "error", retries=max_retries - 1)
+    raise LLMError(f"[{engine}] {provider} stream failed after {max_retries} attempts: {last_error}")
@@ -0,0 +1,235 @@
+# LLM Router
+# Objective: Keep one provider's slowdown or outage from stalling the pipeline. Models that are served
+# by several providers are known under a shared alias; every call to such a model goes to the
+# currently fastest healthy provider and fails over to the next one, and a circuit breaker stops
+# sending traffic to a provider that keeps failing until it has had time to recover.
+
+# Settings:
+# LLM_ROUTER_ENABLED           route aliased models across providers (default true)
+# LLM_ROUTER_RETRIES           attempts per provider before failing over, when there is more than one (default 2)
+# LLM_ROUTER_WINDOW            most recent calls kept per provider for latency and error rates (default 50)
+# LLM_ROUTER_STATS_TTL         seconds a call counts towards latency and error rates (default 300)
+# LLM_BREAKER_FAILURES         consecutive failures that open a provider's circuit (default 3)
+# LLM_BREAKER_COOLDOWN         seconds an open circuit waits before letting a trial call through (default 60)
+
+# A provider is only routed to if its API key is known: the key passed by the engine for the
+# provider it asked for, or <PROVIDER>_API_KEY from the environment for the others.
+
+# A provider's stats only change when it is called, so a provider ranked last after a failure would
+# never be called again while another one is healthy. Calls therefore expire after
+# LLM_ROUTER_STATS_TTL, and a provider whose circuit cooldown has passed counts as unmeasured, so
+# both are ranked first and probed again.
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+LLM_ROUTER_ENABLED = os.getenv("LLM_ROUTER_ENABLED", "true").lower() == "true"
+LLM_ROUTER_RETRIES = int(os.getenv("LLM_ROUTER_RETRIES", "2"))
+LLM_ROUTER_WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "50"))
+LLM_ROUTER_STATS_TTL = float(os.getenv("LLM_ROUTER_STATS_TTL", "300"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "60"))
+
+# Alias -> model name at each provider that serves it, in order of preference
+MODEL_ALIASES = {
+    "llama-3.1-8b-instruct": {
+        "hyperbolic": "meta-llama/Meta-Llama-3.1-8B-Instruct",
+        "openrouter": "meta-llama/llama-3.1-8b-instruct",
+    },
+    "llama-3.1-70b-instruct": {
+        "hyperbolic": "meta-llama/Meta-Llama-3.1-70B-Instruct",
+        "openrouter": "meta-llama/llama-3.1-70b-instruct",
+    },
+    "llama-3.1-405b-instruct": {
+        "hyperbolic": "meta-llama/Meta-Llama-3.1-405B-Instruct",
+        "openrouter": "meta-llama/llama-3.1-405b-instruct",
+    },
+    "llama-3.1-405b": {
+        "hyperbolic": "meta-llama/Meta-Llama-3.1-405B",
+        "openrouter": "meta-llama/llama-3.1-405b",
+    },
+}
+
+T = TypeVar("T")
+
+
+class ProviderHealth:
+    """Rolling latency and error rate of one provider, with a circuit breaker."""
+
+    def __init__(self):
+        self.calls = deque(maxlen=LLM_ROUTER_WINDOW)  # (finished at, latency seconds, succeeded)
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go to this provider, claiming the trial call of a half-open circuit."""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < LLM_BREAKER_COOLDOWN or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self, latency: float):
+        with self.lock:
+            self.calls.append((time.monotonic(), latency, True))
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self, latency: float) -> bool:
+        """Record a failed call and return True if it opened the circuit."""
+        with self.lock:
+            self.calls.append((time.monotonic(), latency, False))
+            self.consecutive_failures += 1
+            was_open = self.opened_at is not None
+            if was_open or self.consecutive_failures >= LLM_BREAKER_FAILURES:
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+            return not was_open and self.opened_at is not None
+
+    def cooled_down(self) -> bool:
+        """Return True if the circuit is open and its cooldown has passed, so a trial call is due."""
+        with self.lock:
+            return self.opened_at is not None and time.monotonic() - self.opened_at >= LLM_BREAKER_COOLDOWN
+
+    def snapshot(self) -> Tuple[Optional[float], float]:
+        """Return mean latency of recent successful calls (None if there are none) and the error rate."""
+        expired = time.monotonic() - LLM_ROUTER_STATS_TTL
+        with self.lock:
+            calls = [(latency, succeeded) for finished_at, latency, succeeded in self.calls if finished_at >= expired]
+        if not calls:
+            return None, 0.0
+        latencies = [latency for latency, succeeded in calls if succeeded]
+        error_rate = 1 - len(latencies) / len(calls)
+        return (sum(latencies) / len(latencies) if latencies else None), error_rate
+
+
+_health: Dict[str, ProviderHealth] = {}
+_health_lock = threading.Lock()
+
+
+def get_health(provider: str) -> ProviderHealth:
+    """Return the health tracker of a provider, creating it on first use."""
+    with _health_lock:
+        health = _health.get(provider)
+        if health is None:
+            health = ProviderHealth()
+            _health[provider] = health
+        return health
+
+
+def resolve_alias(provider: str, model: str) -> Optional[str]:
+    """Return the alias of a provider's model name, or None if no other provider serves it."""
+    for alias, models in MODEL_ALIASES.items():
+        if models.get(provider) == model:
+            return alias
+    return None
+
+
+def rank_providers(alias: str, provider: str, api_key: str) -> List[Tuple[str, str]]:
+    """
+    Order the providers serving an alias from most to least preferable.
+
+    Providers that have not been measured recently, or whose circuit is due a trial call, come first
+    so they get measured; measured ones are ordered by mean latency inflated by their error rate.
+
+    Args:
+        alias (str): Model alias
+        provider (str): Provider the engine asked for
+        api_key (str): API key the engine passed for that provider
+
+    Returns:
+        List[Tuple[str, str]]: (provider, api key) pairs
+    """
+    ranked = []
+    for position, candidate in enumerate(MODEL_ALIASES[alias]):
+        key = api_key if candidate == provider else os.getenv(f"{candidate.upper()}_API_KEY")
+        if not key:
+            continue
+        health = get_health(candidate)
+        mean_latency, error_rate = health.snapshot()
+        if health.cooled_down() or (mean_latency is None and error_rate == 0.0):
+            score = 0.0
+        elif mean_latency is None:
+            score = float("inf")
+        else:
+            score = mean_latency / max(1.0 - error_rate, 0.1)
+        ranked.append((score, candidate != provider, position, candidate, key))
+    ranked.sort()
+    return [(candidate, key) for _, _, _, candidate, key in ranked]
+
+
+def routed_call(
+    provider: str,
+    api_key: str,
+    model: str,
+    engine: str,
+    max_retries: int,
+    send: Callable[[str, str, str, int], T],
+) -> T:
+    """
+    Send a call to the best provider for its model, failing over to the others.
+
+    Args:
+        provider (str): Provider the engine asked for
+        api_key (str): API key for that provider
+        model (str): Model name at that provider
+        engine (str): Name of the calling engine, used in log messages
+        max_retries (int): Attempts the engine asked for
+        send (Callable[[str, str, str, int], T]): Performs the call given provider, api key,
+            model name and attempts
+
+    Returns:
+        T: Result of the first provider that succeeded
+    """
+    alias = resolve_alias(provider, model) if LLM_ROUTER_ENABLED else None
+    if alias is None:
+        return send(provider, api_key, model, max_retries)
+
+    candidates = rank_providers(alias, provider, api_key)
+    attempts = min(max_retries, LLM_ROUTER_RETRIES) if len(candidates) > 1 else max_retries
+    last_error: Optional[Exception] = None
+
+    for candidate, key in candidates:
+        health = get_health(candidate)
+        if not health.allow_request():
+            continue
+        started = time.monotonic()
+        try:
+            result = send(candidate, key, MODEL_ALIASES[alias][candidate], attempts)
+        except Exception as e:
+            if health.record_failure(time.monotonic() - started):
+                print(f"[{engine}] circuit opened for {candidate} for {LLM_BREAKER_COOLDOWN:.0f}s")
+            print(f"[{engine}] {candidate} failed for {alias}, failing over: {e}")
+            last_error = e
+            continue
+        health.record_success(time.monotonic() - started)
+        return result
+
+    if last_error is not None:
+        raise last_error
+    # Every circuit is open: better to try the requested provider than to fail without a call
+    print(f"[{engine}] all providers for {alias} are open, trying {provider} anyway")
+    return send(provider, api_key, model, max_retries)
+
+
+def get_router_stats() -> Dict[str, dict]:
+    """Return mean latency, error rate and circuit state of every provider used so far."""
+    with _health_lock:
+        providers = dict(_health)
+    stats = {}
+    for provider, health in providers.items():
+        mean_latency, error_rate = health.snapshot()
+        stats[provider] = {
+            "mean_latency": mean_latency,
+            "error_rate": error_rate,
+            "circuit_open": health.opened_at is not None,
+        }
+    return stats
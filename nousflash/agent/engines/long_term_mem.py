@@ -9,41 +9,57 @@
 # Text memory w/ significance score 
 
 from typing import List, Dict
-import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import Column, Integer, String, Float, DateTime
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.sql import func
-from openai import OpenAI
+from models import LongTermMemory
+from db.vectors import pack_embedding
+from engines.memory_index import get_memory_index
+from engines.embedding_cache import get_cached_embedding, put_cached_embedding
+from engines.embedding_backends import get_embedding_backend
 
-Base = declarative_base()
+def create_embeddings(texts: List[str], openai_api_key: str) -> List[List[float]]:
+    """
+    Create embeddings for many texts with the active embedding backend, sending all
+    uncached texts in as few requests as possible.
+    
+    Args:
+        texts (List[str]): Texts to create embeddings for
+        openai_api_key (str): OpenAI API key, used by the openai backend
+    
+    Returns:
+        List[List[float]]: Embedding vectors in the same order as texts
+    """
+    backend = get_embedding_backend(openai_api_key)
 
-class LongTermMemory(Base):
-    __tablename__ = "long_term_memories"
+    embeddings = {}
+    missing = []
+    for text in dict.fromkeys(texts):
+        cached = get_cached_embedding(backend.cache_namespace, text)
+        if cached is not None:
+            embeddings[text] = cached
+        else:
+            missing.append(text)
 
-    id = Column(Integer, primary_key=True, index=True)
-    content = Column(String, nullable=False)
-    embedding = Column(String, nullable=False)  # Store as JSON string
-    significance_score = Column(Float, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    for start in range(0, len(missing), backend.batch_size):
+        batch = missing[start:start + backend.batch_size]
+        for text, embedding in zip(batch, backend.embed(batch)):
+            embeddings[text] = embedding
+            put_cached_embedding(backend.cache_namespace, text, embedding)
+
+    return [embeddings[text] for text in texts]
 
 def create_embedding(text: str, openai_api_key: str) -> List[float]:
     """
-    Create an embedding for the given text using OpenAI's API.
+    Create an embedding for the given text using the active embedding backend.
+    Texts that have been embedded before are served from the embedding cache.
     
     Args:
         text (str): Text to create an embedding for
-        openai_api_key (str): OpenAI API key
+        openai_api_key (str): OpenAI API key, used by the openai backend
     
     Returns:
         List[float]: Embedding vector
     """
-    client = OpenAI(api_key=openai_api_key)
-    response = client.embeddings.create(
-        input=text,
-        model="text-embedding-3-small"
-    )
-    return response.data[0].embedding
+    return create_embeddings([text], openai_api_key)[0]
 
 def store_memory(db: Session, content: str, embedding: List[float], significance_score: float):
     """
@@ -55,14 +71,57 @@ def store_memory(db: Session, content: str, embedding: List[float], significance
         embedding (List[float]): Embedding vector
         significance_score (float): Significance score of the memory
     """
+    # Load the resident index before inserting so the new row is not indexed twice
+    index = get_memory_index(db)
+
     new_memory = LongTermMemory(
         content=content,
-        embedding=str(embedding),  # Convert to string for storage
+        embedding=pack_embedding(embedding),
+        embedding_model=index.embedding_model,
+        embedding_dim=len(embedding),
         significance_score=significance_score
     )
     db.add(new_memory)
     db.commit()
 
+    index.add(new_memory.id, content, embedding, significance_score, new_memory.created_at)
+
+def import_memories(db: Session, memories: List[Dict], openai_api_key: str):
+    """
+    Embed and store many memories at once, e.g. when seeding or importing a backlog.
+    
+    Args:
+        db (Session): Database session
+        memories (List[Dict]): Memories with content and significance_score
+        openai_api_key (str): OpenAI API key
+    """
+    index = get_memory_index(db)
+
+    contents = [memory["content"] for memory in memories]
+    embeddings = create_embeddings(contents, openai_api_key)
+
+    new_memories = [
+        LongTermMemory(
+            content=memory["content"],
+            embedding=pack_embedding(embedding),
+            embedding_model=index.embedding_model,
+            embedding_dim=len(embedding),
+            significance_score=memory["significance_score"]
+        )
+        for memory, embedding in zip(memories, embeddings)
+    ]
+    db.add_all(new_memories)
+    db.commit()
+
+    for new_memory, embedding in zip(new_memories, embeddings):
+        index.add(
+            new_memory.id,
+            new_memory.content,
+            embedding,
+            new_memory.significance_score,
+            new_memory.created_at
+        )
+
 def format_long_term_memories(memories: List[Dict]) -> str:
     """
     Format retrieved long-term memories into a clean, readable string format
@@ -77,12 +136,10 @@ def format_long_term_memories(memories: List[Dict]) -> str:
     if not memories:
         return "No relevant memories found"
     
-    # Sort memories by significance score for better organization
-    sorted_memories = sorted(memories, key=lambda x: x.get('significance_score', 0), reverse=True)
-    
+    # Memories arrive already ranked by the index's combined similarity/significance/recency score
     formatted_parts = ["Past memories and thoughts:"]
     
-    for memory in sorted_memories:
+    for memory in memories:
         content = memory.get('content', '').strip()
         # Optional: include score if you want
         # score = memory.get('significance_score', 0)
@@ -104,21 +161,6 @@ def retrieve_relevant_memories(db: Session, query_embedding: List[float], top_k:
     Returns:
         str: Formatted string of relevant memories
     """
-    all_memories = db.query(LongTermMemory).all()
-    
-    def cosine_similarity(a, b):
-        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
-    
-    similarities = [
-        (memory, cosine_similarity(query_embedding, eval(memory.embedding)))
-        for memory in all_memories
-    ]
-    
-    sorted_memories = sorted(similarities, key=lambda x: x[1], reverse=True)[:top_k]
-    
-    memories_list = [
-        {"content": memory.content, "significance_score": memory.significance_score}
-        for memory, _ in sorted_memories
-    ]
-    
+    memories_list = get_memory_index(db).search(query_embedding, top_k, db=db)
+
     return format_long_term_memories(memories_list)
\ No newline at end of file
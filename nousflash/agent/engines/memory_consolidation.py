@@ -0,0 +1,142 @@
+# Memory Consolidation
+# Objective: Keep long-term memory bounded. Near-duplicate memories are merged into a single
+# representative and low-value old memories are pruned once the store exceeds its size budget,
+# so retrieval cost and the memories section of the prompt stay small.
+
+# Inputs:
+# The resident memory index and the long_term_memories table
+
+# Outputs:
+# Counts of merged and pruned memories
+
+# Settings:
+# LTM_DEDUP_THRESHOLD      cosine similarity at which two memories count as duplicates (default 0.95)
+# LTM_MAX_MEMORIES         size budget for long_term_memories (default 10000)
+# LTM_PRUNE_MIN_AGE_DAYS   memories younger than this are never pruned (default 30)
+
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+import numpy as np
+from sqlalchemy.orm import Session
+from models import LongTermMemory
+from engines.memory_index import get_memory_index
+
+LTM_DEDUP_THRESHOLD = float(os.getenv("LTM_DEDUP_THRESHOLD", "0.95"))
+LTM_MAX_MEMORIES = int(os.getenv("LTM_MAX_MEMORIES", "10000"))
+LTM_PRUNE_MIN_AGE_DAYS = int(os.getenv("LTM_PRUNE_MIN_AGE_DAYS", "30"))
+
+# Rows compared against the whole store per matrix product while deduplicating
+_BLOCK_SIZE = 512
+# Rows of the store read at a time for those products, bounds the float32 copy in int8 mode
+_COLUMN_BLOCK_SIZE = 4096
+
+
+def find_duplicates(
+    get_rows: Callable[[np.ndarray], np.ndarray],
+    norms: np.ndarray,
+    priority: np.ndarray,
+    threshold: float,
+) -> Dict[int, int]:
+    """
+    Greedily cluster near-duplicate rows around the highest-priority member of each cluster.
+
+    Args:
+        get_rows (Callable[[np.ndarray], np.ndarray]): Returns the float32 embeddings of the
+            given rows, e.g. MemoryIndex.vectors
+        norms (np.ndarray): Row norms of the embeddings, one per memory
+        priority (np.ndarray): Row order to visit, most valuable first
+        threshold (float): Cosine similarity at or above which rows are duplicates
+
+    Returns:
+        Dict[int, int]: Maps each duplicate row to the representative row it merges into
+    """
+    size = len(norms)
+    inverse_norms = 1.0 / np.maximum(norms, 1e-12)
+    merged_into = {}
+    removed = np.zeros(size, dtype=bool)
+
+    for start in range(0, len(priority), _BLOCK_SIZE):
+        block = priority[start:start + _BLOCK_SIZE]
+        block_vectors = get_rows(block) * inverse_norms[block, None]
+        similarities = np.empty((len(block), size), dtype=np.float32)
+        for column in range(0, size, _COLUMN_BLOCK_SIZE):
+            columns = np.arange(column, min(column + _COLUMN_BLOCK_SIZE, size))
+            similarities[:, columns] = block_vectors @ (get_rows(columns) * inverse_norms[columns, None]).T
+        for offset, row in enumerate(block):
+            if removed[row]:
+                continue
+            duplicates = np.flatnonzero((similarities[offset] >= threshold) & ~removed)
+            for duplicate in duplicates:
+                if duplicate != row:
+                    removed[duplicate] = True
+                    merged_into[int(duplicate)] = int(row)
+
+    return merged_into
+
+
+def consolidate_memories(db: Session) -> Dict[str, int]:
+    """
+    Merge near-duplicate memories and prune old low-significance ones over the size budget.
+
+    Args:
+        db (Session): Database session
+
+    Returns:
+        Dict[str, int]: Number of memories merged and pruned
+    """
+    index = get_memory_index(db)
+    merged = 0
+
+    if index.size > 1:
+        ids = index.ids[:index.size]
+        significance = index.significance[:index.size]
+        # Most significant first, newest first among equals
+        priority = np.lexsort((-ids, -significance))
+        merged_into = find_duplicates(
+            index.vectors, index.norms[:index.size], priority, LTM_DEDUP_THRESHOLD
+        )
+
+        if merged_into:
+            best_scores = {}
+            for duplicate, representative in merged_into.items():
+                best_scores[representative] = max(
+                    best_scores.get(representative, significance[representative]),
+                    significance[duplicate],
+                )
+            for representative, score in best_scores.items():
+                db.query(LongTermMemory).filter(LongTermMemory.id == int(ids[representative])).update(
+                    {"significance_score": float(score)}, synchronize_session=False
+                )
+            duplicate_ids = [int(ids[row]) for row in merged_into]
+            db.query(LongTermMemory).filter(LongTermMemory.id.in_(duplicate_ids)).delete(synchronize_session=False)
+            db.commit()
+            merged = len(duplicate_ids)
+
+    pruned = 0
+    overflow = db.query(LongTermMemory).count() - LTM_MAX_MEMORIES
+    if overflow > 0:
+        cutoff = datetime.utcnow() - timedelta(days=LTM_PRUNE_MIN_AGE_DAYS)
+        prune_ids = [
+            memory_id for (memory_id,) in db.query(LongTermMemory.id)
+            .filter(LongTermMemory.created_at < cutoff)
+            .order_by(LongTermMemory.significance_score.asc(), LongTermMemory.created_at.asc())
+            .limit(overflow)
+        ]
+        if prune_ids:
+            db.query(LongTermMemory).filter(LongTermMemory.id.in_(prune_ids)).delete(synchronize_session=False)
+            db.commit()
+            pruned = len(prune_ids)
+
+    if merged or pruned:
+        index.load(db)
+
+    print(f"Memory consolidation merged {merged} duplicates and pruned {pruned} memories.")
+    return {"merged": merged, "pruned": pruned}
+
+
+if __name__ == "__main__":
+    from db.db_setup import SessionLocal
+
+    with SessionLocal() as session:
+        consolidate_memories(session)
@@ -0,0 +1,392 @@
+# Memory Index
+# Objective: Keep every long-term memory embedding resident in a single NumPy matrix so that
+# retrieval is one matrix-vector product instead of a Python loop over database rows.
+
+# The index is loaded from the database once per process and appended to by store_memory,
+# so the long_term_memories table is only scanned at startup. Only memories embedded by the
+# active embedding backend are loaded, so vectors from different backends are never compared.
+# Memories stored at a larger dimension than the backend currently produces (EMBEDDING_DIMENSIONS)
+# are truncated and renormalized on load.
+
+# Memories are ranked by a weighted sum of cosine similarity, significance (scaled to 0-1) and an
+# exponential recency decay on created_at, computed in one vectorized pass.
+
+# Settings:
+# LTM_WEIGHT_SIMILARITY    weight of cosine similarity (default 1.0)
+# LTM_WEIGHT_SIGNIFICANCE  weight of significance_score / 10 (default 0.2)
+# LTM_WEIGHT_RECENCY       weight of the recency decay (default 0.1)
+# LTM_RECENCY_HALF_LIFE_DAYS  age at which the recency term halves (default 30)
+# LTM_QUANTIZATION         "int8" to keep embeddings resident as int8 codes (default "none")
+# LTM_RERANK_FACTOR        int8 mode re-ranks top_k * factor candidates with exact float32 vectors
+#                          read back from the database (default 10)
+
+# In int8 mode each row is stored as symmetric int8 codes with a per-row scale, a quarter of the
+# float32 footprint. The first stage scores every candidate from the codes, then the shortlist is
+# re-scored exactly so the final top_k matches the float32 ranking.
+
+# Usage, to check that claim on synthetic memories without touching the agent's database:
+# python -m engines.memory_index [--rows 20000] [--queries 20] [--dim 1536]
+
+import os
+import time
+import atexit
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from models import LongTermMemory
+from db.vectors import unpack_embedding, fit_embedding
+from engines.ann_index import IVFIndex, ANN_ENABLED, ANN_MIN_SIZE
+from engines.embedding_backends import get_embedding_model_name, get_embedding_dim
+
+LTM_WEIGHT_SIMILARITY = float(os.getenv("LTM_WEIGHT_SIMILARITY", "1.0"))
+LTM_WEIGHT_SIGNIFICANCE = float(os.getenv("LTM_WEIGHT_SIGNIFICANCE", "0.2"))
+LTM_WEIGHT_RECENCY = float(os.getenv("LTM_WEIGHT_RECENCY", "0.1"))
+LTM_RECENCY_HALF_LIFE_DAYS = float(os.getenv("LTM_RECENCY_HALF_LIFE_DAYS", "30"))
+LTM_QUANTIZATION = os.getenv("LTM_QUANTIZATION", "none").lower()
+LTM_RERANK_FACTOR = int(os.getenv("LTM_RERANK_FACTOR", "10"))
+
+_INITIAL_CAPACITY = 256
+# Rows dequantized at a time when scoring int8 codes, bounds the float32 scratch space
+_INT8_BLOCK_SIZE = 4096
+
+
+def _to_timestamp(created_at: Optional[datetime]) -> float:
+    """Convert a created_at value to epoch seconds. SQLite returns naive UTC datetimes."""
+    if created_at is None:
+        return time.time()
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at.timestamp()
+
+
+class MemoryIndex:
+    """Process-resident embedding matrix with precomputed row norms."""
+
+    def __init__(self, quantization: str = LTM_QUANTIZATION):
+        self.quantization = quantization
+        self._reset()
+
+    def _reset(self):
+        self.loaded = False
+        # Set from the embedding backend on first load or add, so a bad backend setting is
+        # reported when the index is first used rather than when this module is imported
+        self.embedding_model: Optional[str] = None
+        self.dim: Optional[int] = None
+        self.size = 0
+        self.ids = np.empty(0, dtype=np.int64)
+        self.significance = np.empty(0, dtype=np.float32)
+        self.created_at = np.empty(0, dtype=np.float64)
+        self.norms = np.empty(0, dtype=np.float32)
+        self.quantized = self.quantization == "int8"
+        self.matrix = np.empty((0, 0), dtype=np.int8 if self.quantized else np.float32)
+        self.scales = np.empty(0, dtype=np.float32)
+        self.contents: List[str] = []
+        self.ann: Optional[IVFIndex] = None
+
+    def load(self, db: Session):
+        """
+        Build the index from every long_term_memories row embedded by the active backend.
+
+        Args:
+            db (Session): Database session
+        """
+        self.close()
+        self._reset()
+        self._configure()
+        rows = db.query(
+            LongTermMemory.id,
+            LongTermMemory.content,
+            LongTermMemory.embedding,
+            LongTermMemory.significance_score,
+            LongTermMemory.created_at,
+        ).filter(LongTermMemory.embedding_model == self.embedding_model).all()
+
+        for memory_id, content, embedding, significance_score, created_at in rows:
+            self.add(memory_id, content, unpack_embedding(embedding), significance_score, created_at)
+
+        # Attach the ANN index after bulk loading so rows are assigned in one pass
+        if ANN_ENABLED:
+            self.ann = IVFIndex()
+            self.ann.attach(self.vectors, self.ids[:self.size])
+
+        self.loaded = True
+        print(f"Loaded {self.size} long-term memories into the memory index.")
+
+    def _configure(self):
+        """Take the embedding model and dimension from the active embedding backend."""
+        self.embedding_model = get_embedding_model_name()
+        self.dim = get_embedding_dim()
+        self.matrix = np.empty((0, self.dim), dtype=self.matrix.dtype)
+
+    def close(self):
+        """Persist state kept in memory since it was loaded, i.e. new ANN list assignments."""
+        if self.ann is not None:
+            self.ann.close(self.ids[:self.size])
+
+    def _grow(self, capacity: int):
+        """Resize the backing arrays to hold at least `capacity` rows."""
+        matrix = np.zeros((capacity, self.dim), dtype=self.matrix.dtype)
+        matrix[:self.size] = self.matrix[:self.size]
+        self.matrix = matrix
+        self.scales = np.resize(self.scales, capacity)
+        self.ids = np.resize(self.ids, capacity)
+        self.significance = np.resize(self.significance, capacity)
+        self.created_at = np.resize(self.created_at, capacity)
+        self.norms = np.resize(self.norms, capacity)
+
+    def add(
+        self,
+        memory_id: int,
+        content: str,
+        embedding,
+        significance_score: float,
+        created_at: Optional[datetime] = None,
+    ):
+        """
+        Append a memory to the index. Amortised O(dim) thanks to capacity doubling.
+
+        Args:
+            memory_id (int): Primary key of the stored memory
+            content (str): Memory content
+            embedding (List[float] | np.ndarray): Embedding vector
+            significance_score (float): Significance score of the memory
+            created_at (datetime): When the memory was stored, defaults to now
+        """
+        if self.dim is None:
+            self._configure()
+        vector = fit_embedding(np.asarray(embedding, dtype=np.float32), self.dim)
+        if vector is None:
+            print(f"Skipping memory {memory_id}: embedding has {len(embedding)} dims, index has {self.dim}")
+            return
+
+        if self.size == self.matrix.shape[0]:
+            self._grow(max(_INITIAL_CAPACITY, 2 * self.matrix.shape[0]))
+
+        row = self.size
+        if self.quantized:
+            scale = float(np.max(np.abs(vector))) / 127.0 or 1.0
+            self.matrix[row] = np.round(vector / scale).astype(np.int8)
+            self.scales[row] = scale
+        else:
+            self.matrix[row] = vector
+        self.norms[row] = np.linalg.norm(vector)
+        self.ids[row] = memory_id
+        self.significance[row] = significance_score
+        self.created_at[row] = _to_timestamp(created_at)
+        self.contents.append(content)
+        self.size += 1
+
+        if self.ann is not None:
+            self.ann.add(vector, self.ids[:self.size], self.vectors)
+
+    def vectors(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Return the embeddings of the given rows as float32, dequantizing int8 codes if needed.
+
+        Callers walking the whole index pass it a block of rows at a time, so int8 mode never
+        holds a float32 copy of the full matrix.
+
+        Args:
+            rows (np.ndarray): Row indices
+
+        Returns:
+            np.ndarray: One embedding per row
+        """
+        if self.quantized:
+            return self.matrix[rows].astype(np.float32) * self.scales[rows, None]
+        return self.matrix[rows]
+
+    def _dot(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Dot products between the query and the given rows, approximate in int8 mode."""
+        if not self.quantized:
+            return self.matrix[rows] @ query
+        products = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), _INT8_BLOCK_SIZE):
+            block = rows[start:start + _INT8_BLOCK_SIZE]
+            products[start:start + len(block)] = self.vectors(block) @ query
+        return products
+
+    def _score(self, rows: np.ndarray, similarities: np.ndarray) -> np.ndarray:
+        """Combine similarity, significance and recency for the given rows."""
+        age_days = (time.time() - self.created_at[rows]) / 86400.0
+        return (
+            LTM_WEIGHT_SIMILARITY * similarities
+            + LTM_WEIGHT_SIGNIFICANCE * self.significance[rows] / 10.0
+            + LTM_WEIGHT_RECENCY * np.exp2(-np.maximum(age_days, 0.0) / LTM_RECENCY_HALF_LIFE_DAYS)
+        )
+
+    def _exact_similarities(self, db: Session, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Re-score int8 candidates against their float32 embeddings stored in the database."""
+        row_ids = self.ids[rows].tolist()
+        stored = dict(
+            db.query(LongTermMemory.id, LongTermMemory.embedding)
+            .filter(LongTermMemory.id.in_(row_ids))
+            .all()
+        )
+        query_norm = np.linalg.norm(query)
+        similarities = np.full(len(rows), -1.0, dtype=np.float32)
+        for i, (row, memory_id) in enumerate(zip(rows, row_ids)):
+            if memory_id in stored:
+                vector = fit_embedding(unpack_embedding(stored[memory_id]), self.dim)
+                similarities[i] = (vector @ query) / (self.norms[row] * query_norm + 1e-12)
+        return similarities
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        """Positions of the k highest scores, best first."""
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def search(self, query_embedding, top_k: int = 5, db: Optional[Session] = None) -> List[Dict]:
+        """
+        Return the top_k memories by combined similarity, significance and recency score.
+
+        Args:
+            query_embedding (List[float] | np.ndarray): Query embedding vector
+            top_k (int): Number of memories to return
+            db (Session): Database session, used in int8 mode to re-rank with float32 vectors
+
+        Returns:
+            List[Dict]: Memories ordered by decreasing score
+        """
+        if self.size == 0:
+            return []
+        query = fit_embedding(np.asarray(query_embedding, dtype=np.float32), self.dim)
+        if query is None:
+            return []
+
+        # Small stores, or stores the ANN index has not been trained on, use exact search
+        if self.ann is not None and self.ann.trained and self.size >= ANN_MIN_SIZE:
+            rows = self.ann.candidate_rows(query)
+        else:
+            rows = np.arange(self.size)
+        if len(rows) == 0:
+            return []
+
+        similarities = self._dot(rows, query) / (self.norms[rows] * np.linalg.norm(query) + 1e-12)
+        scores = self._score(rows, similarities)
+
+        if self.quantized and db is not None:
+            shortlist = self._top(scores, top_k * LTM_RERANK_FACTOR)
+            rows = rows[shortlist]
+            similarities = self._exact_similarities(db, rows, query)
+            scores = self._score(rows, similarities)
+
+        top = self._top(scores, top_k)
+
+        return [
+            {
+                "id": int(self.ids[rows[i]]),
+                "content": self.contents[rows[i]],
+                "significance_score": float(self.significance[rows[i]]),
+                "similarity": float(similarities[i]),
+                "score": float(scores[i]),
+            }
+            for i in top
+        ]
+
+
+_memory_index = MemoryIndex()
+atexit.register(_memory_index.close)
+
+
+def get_memory_index(db: Session) -> MemoryIndex:
+    """
+    Return the process-wide memory index, loading it from the database on first use.
+
+    Args:
+        db (Session): Database session
+
+    Returns:
+        MemoryIndex: The shared index
+    """
+    if not _memory_index.loaded:
+        _memory_index.load(db)
+    return _memory_index
+
+
+def compare_quantization(rows: int = 20000, queries: int = 20, top_k: int = 5, dim: int = 1536, seed: int = 0) -> Dict:
+    """
+    Compare int8 search against float32 search on synthetic memories.
+
+    Both indexes are searched exactly, without the ANN index. The float32 embeddings the int8 mode
+    re-ranks with are kept in an in-memory SQLite database.
+
+    Args:
+        rows (int): Number of synthetic memories
+        queries (int): Number of queries, each a perturbed copy of a random memory
+        top_k (int): Results compared per query
+        dim (int): Embedding dimension
+        seed (int): Random seed
+
+    Returns:
+        Dict: Queries with identical top_k ids, resident bytes of both matrices and mean search
+            seconds of both modes
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from db.vectors import pack_embedding
+
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((rows, dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    significance = rng.integers(1, 11, rows).astype(np.float32)
+    now = datetime.now(timezone.utc)
+    created_at = [now - timedelta(days=float(days)) for days in rng.uniform(0, 90, rows)]
+
+    engine = create_engine("sqlite://")
+    LongTermMemory.__table__.create(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.bulk_insert_mappings(LongTermMemory, [
+        {"id": i + 1, "content": "", "embedding": pack_embedding(embeddings[i]), "significance_score": float(significance[i])}
+        for i in range(rows)
+    ])
+    session.commit()
+
+    indexes = {"none": MemoryIndex("none"), "int8": MemoryIndex("int8")}
+    for index in indexes.values():
+        index.embedding_model = "synthetic"
+        index.dim = dim
+        index.matrix = np.empty((0, dim), dtype=index.matrix.dtype)
+        for i in range(rows):
+            index.add(i + 1, "", embeddings[i], significance[i], created_at[i])
+
+    identical = 0
+    seconds = {"none": 0.0, "int8": 0.0}
+    for row in rng.integers(0, rows, queries):
+        query = embeddings[row] + 0.05 * rng.standard_normal(dim).astype(np.float32)
+        results = {}
+        for mode, index in indexes.items():
+            started = time.monotonic()
+            results[mode] = [memory["id"] for memory in index.search(query, top_k, session)]
+            seconds[mode] += time.monotonic() - started
+        identical += results["none"] == results["int8"]
+    session.close()
+
+    float_index, int8_index = indexes["none"], indexes["int8"]
+    return {
+        "queries": queries,
+        "identical": identical,
+        "float32_bytes": float_index.matrix[:rows].nbytes,
+        "int8_bytes": int8_index.matrix[:rows].nbytes + int8_index.scales[:rows].nbytes,
+        "float32_seconds": seconds["none"] / queries,
+        "int8_seconds": seconds["int8"] / queries,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare int8 and float32 memory search on synthetic memories")
+    parser.add_argument("--rows", type=int, default=20000, help="number of synthetic memories")
+    parser.add_argument("--queries", type=int, default=20, help="number of queries")
+    parser.add_argument("--dim", type=int, default=1536, help="embedding dimension")
+    args = parser.parse_args()
+    result = compare_quantization(args.rows, args.queries, dim=args.dim)
+    print(f"Identical top-5 results: {result['identical']}/{result['queries']} queries")
+    print(
+        f"Resident embeddings: float32 {result['float32_bytes'] / 2**20:.1f} MiB, "
+        f"int8 {result['int8_bytes'] / 2**20:.1f} MiB ({result['float32_bytes'] / result['int8_bytes']:.2f}x smaller)"
+    )
+    print(f"Mean search time: float32 {result['float32_seconds'] * 1000:.1f} ms, int8 {result['int8_seconds'] * 1000:.1f} ms")
@@ -0,0 +1,113 @@
+# Model Cascade
+# Objective: Stop sending trivially empty or obvious decisions to a 70B model. Engines that opt in
+# first try a local heuristic, then a small fast model, and only escalate to their usual large model
+# when neither is confident. Each engine decides what counts as confident; decisions with side
+# effects (following someone, sending SOL) are only ever approved by the large model.
+
+# Settings:
+# MODEL_CASCADE_ENGINES    comma-separated engine names to cascade, e.g. "follow_user,wallet_send,significance_scorer" (default none)
+# <ENGINE>_CASCADE_MODEL   small model for an engine, as an alias from engines/llm_router.py or a model name at
+#                          the engine's provider; "none" skips straight from the heuristic to the large model
+#                          (default llama-3.1-8b-instruct)
+
+import os
+import threading
+from typing import Callable, Dict, Optional, TypeVar
+from engines.llm_router import MODEL_ALIASES
+
+MODEL_CASCADE_ENGINES = {
+    engine.strip() for engine in os.getenv("MODEL_CASCADE_ENGINES", "").split(",") if engine.strip()
+}
+DEFAULT_CASCADE_MODEL = "llama-3.1-8b-instruct"
+
+T = TypeVar("T")
+
+_stats: Dict[str, Dict[str, int]] = {}
+_lock = threading.Lock()
+
+
+def is_cascade_enabled(engine: str) -> bool:
+    """Return True if decisions of this engine should go through the cascade."""
+    return engine in MODEL_CASCADE_ENGINES
+
+
+def get_cascade_model(engine: str, provider: str) -> Optional[str]:
+    """
+    Return the small model an engine tries before escalating.
+
+    Args:
+        engine (str): Name of the engine
+        provider (str): Provider the engine calls
+
+    Returns:
+        Optional[str]: Model name at the provider, or None if the engine has no small model
+    """
+    model = os.getenv(f"{engine.upper()}_CASCADE_MODEL", DEFAULT_CASCADE_MODEL)
+    if model.lower() == "none":
+        return None
+    return MODEL_ALIASES.get(model, {}).get(provider, model)
+
+
+def _count(engine: str, tier: str):
+    with _lock:
+        stats = _stats.setdefault(engine, {"calls": 0, "heuristic": 0, "small_model": 0, "escalated": 0})
+        stats["calls"] += 1
+        stats[tier] += 1
+
+
+def cascade(
+    engine: str,
+    provider: str,
+    large: Callable[[], T],
+    heuristic: Optional[Callable[[], Optional[T]]] = None,
+    small: Optional[Callable[[str], Optional[T]]] = None,
+) -> T:
+    """
+    Make a decision with the cheapest tier that is confident about it.
+
+    Args:
+        engine (str): Name of the calling engine
+        provider (str): Provider the engine calls, used to resolve its small model
+        large (Callable[[], T]): Makes the decision with the large model
+        heuristic (Optional[Callable[[], Optional[T]]]): Returns the decision if it is obvious
+            from the input, None otherwise
+        small (Optional[Callable[[str], Optional[T]]]): Makes the decision with the small model
+            it is given, returning None when the answer is not confident enough to act on
+
+    Returns:
+        T: The decision
+    """
+    if not is_cascade_enabled(engine):
+        return large()
+
+    if heuristic is not None:
+        decision = heuristic()
+        if decision is not None:
+            print(f"[{engine}] decided by heuristic")
+            _count(engine, "heuristic")
+            return decision
+
+    model = get_cascade_model(engine, provider)
+    if small is not None and model is not None:
+        try:
+            decision = small(model)
+        except Exception as e:
+            print(f"[{engine}] small model {model} failed: {e}")
+            decision = None
+        if decision is not None:
+            print(f"[{engine}] decided by small model {model}")
+            _count(engine, "small_model")
+            return decision
+
+    print(f"[{engine}] escalating to the large model")
+    _count(engine, "escalated")
+    return large()
+
+
+def get_cascade_stats() -> Dict[str, dict]:
+    """Return how each cascaded engine's decisions were made, and its escalation rate, for this process."""
+    with _lock:
+        stats = {engine: dict(counts) for engine, counts in _stats.items()}
+    for counts in stats.values():
+        counts["escalation_rate"] = counts["escalated"] / counts["calls"] if counts["calls"] else 0.0
+    return stats
@@ -12,12 +12,56 @@
 # Things to consider:
 # Database schema. Schemas for posts and how replies are classified.
 
-import time
-import requests
+# Settings:
+# POST_MAKER_STREAMING       stream the base model output and stop once a full tweet is out (default false)
+# POST_MAKER_MAX_TWEET_CHARS length at which a streamed tweet counts as complete (default 280)
+# POST_MAKER_LOCAL_EXTRACTOR extract the tweet locally and only call the LLM formatter as a fallback (default true)
+# POST_MAKER_CANDIDATES      candidate posts sampled per cycle; above 1 the best scoring one is posted (default 1)
+
+import os
 from typing import List, Dict
 from engines.prompts import get_tweet_prompt
+from engines.llm_client import completion, completions, chat_completion, stream_completion, LLMError
+from engines.tweet_extractor import extract_tweet
+
+POST_MAKER_STREAMING = os.getenv("POST_MAKER_STREAMING", "false").lower() == "true"
+POST_MAKER_MAX_TWEET_CHARS = int(os.getenv("POST_MAKER_MAX_TWEET_CHARS", "280"))
+POST_MAKER_LOCAL_EXTRACTOR = os.getenv("POST_MAKER_LOCAL_EXTRACTOR", "true").lower() == "true"
+POST_MAKER_CANDIDATES = int(os.getenv("POST_MAKER_CANDIDATES", "1"))
+
+# Stop sequences of the base model, also checked locally while streaming
+BASE_MODEL_STOP = ["<|im_end|>", "<"]
+
+def is_tweet_finished(text: str) -> bool:
+    """Return True once streamed output contains a stop sequence or a non-empty line terminated by a newline."""
+    if any(stop in text for stop in BASE_MODEL_STOP):
+        return True
+    text = text.lstrip()
+    return "\n" in text and bool(text.split("\n", 1)[0].strip())
+
+def is_tweet_complete(text: str) -> bool:
+    """
+    Decide whether streamed base model output already contains a complete tweet.
+
+    A tweet is complete once a stop sequence appears, once a non-empty line has been
+    terminated by a newline, or once the text reaches the tweet length limit.
+
+    Args:
+        text (str): Output streamed so far
 
-def generate_post(short_term_memory: str, long_term_memories: List[Dict], recent_posts: List[Dict], external_context, llm_api_key: str) -> str:
+    Returns:
+        bool: True if the stream can be stopped
+    """
+    return is_tweet_finished(text) or len(text.lstrip()) >= POST_MAKER_MAX_TWEET_CHARS
+
+def trim_streamed_tweet(text: str) -> str:
+    """Cut streamed output down to the first complete tweet."""
+    for stop in BASE_MODEL_STOP:
+        text = text.split(stop, 1)[0]
+    text = text.lstrip()
+    return text.split("\n", 1)[0] if "\n" in text else text
+
+def generate_post(short_term_memory: str, long_term_memories: List[Dict], recent_posts: List[Dict], external_context, llm_api_key: str, example_tweets: str = None) -> str:
     """
     Generate a new post or reply based on short-term memory, long-term memories, and recent posts.
     
@@ -28,12 +72,13 @@ def generate_post(short_term_memory: str, long_term_memories: List[Dict], recent
         openrouter_api_key (str): API key for OpenRouter
         your_site_url (str): Your site URL for OpenRouter API
         your_app_name (str): Your app name for OpenRouter API
+        example_tweets (str): Selected few-shot examples, None for the full example list
     
     Returns:
         str: Generated post or reply
     """
 
-    prompt = get_tweet_prompt(external_context, short_term_memory, long_term_memories, recent_posts)
+    prompt = get_tweet_prompt(external_context, short_term_memory, long_term_memories, recent_posts, example_tweets)
 
     print(f"Generating post with prompt: {prompt}")
 
@@ -41,53 +86,89 @@ def generate_post(short_term_memory: str, long_term_memories: List[Dict], recent
     tries = 0
     max_tries = 3
     base_model_output = ""
+    truncated = False
     while tries < max_tries:
         try:
-            response = requests.post(
-                url="https://api.hyperbolic.xyz/v1/completions",
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {llm_api_key}",
-                },
-                json = {
-                "prompt": prompt,
-                "model": "meta-llama/Meta-Llama-3.1-405B",
-                "max_tokens": 512,
-                "temperature": 1,
-                "top_p": 0.95,
-                "top_k": 40,
-                "stop":["<|im_end|>", "<"]
-                }
-            )
+            if POST_MAKER_STREAMING:
+                streamed, finish_reason = stream_completion(
+                    "hyperbolic",
+                    llm_api_key,
+                    model="meta-llama/Meta-Llama-3.1-405B",
+                    prompt=prompt,
+                    engine="post_maker",
+                    should_stop=is_tweet_complete,
+                    with_finish_reason=True,
+                    max_tokens=512,
+                    temperature=1,
+                    top_p=0.95,
+                    top_k=40,
+                    stop=BASE_MODEL_STOP,
+                )
+                # Trimming drops the newline that showed the line was finished, so decide on the
+                # untrimmed text: a stream stopped early is only cut off if it stopped on length
+                truncated = finish_reason == "length" or (
+                    finish_reason is None
+                    and not is_tweet_finished(streamed)
+                    and len(streamed.lstrip()) >= POST_MAKER_MAX_TWEET_CHARS
+                )
+                content = trim_streamed_tweet(streamed)
+            else:
+                content, finish_reason = completion(
+                    "hyperbolic",
+                    llm_api_key,
+                    model="meta-llama/Meta-Llama-3.1-405B",
+                    prompt=prompt,
+                    engine="post_maker",
+                    bypass_cache=tries > 0,
+                    with_finish_reason=True,
+                    max_tokens=512,
+                    temperature=1,
+                    top_p=0.95,
+                    top_k=40,
+                    stop=BASE_MODEL_STOP,
+                )
+                truncated = finish_reason == "length"
+        except LLMError as e:
+            print(f"Base model generation failed: {str(e)}")
+            break
+        if content and content.strip():
+            print(f"Base model generated with response: {content}")
+            base_model_output = content
+            break
+        tries += 1
 
-            if response.status_code == 200:
-                content = response.json()['choices'][0]['text']
-                if content and content.strip():
-                    print(f"Base model generated with response: {content}")
-                    base_model_output = content
-                    break
-            # print(f"Attempt {tries + 1} failed. Status code: {response.status_code}")
-            # print(f"Response: {response.text}")
-        except Exception as e:
-            print(f"Error on attempt {tries + 1}: {str(e)}")
-            tries += 1
-            time.sleep(1)  # Add a small delay between retries
-
-    time.sleep(5)
+    # EXTRACT THE TWEET LOCALLY, THE LLM FORMATTER BELOW IS ONLY A FALLBACK
+    if POST_MAKER_LOCAL_EXTRACTOR:
+        tweet = extract_tweet(base_model_output, truncated)
+        if tweet:
+            print(f"Response: {tweet}")
+            return tweet
+        print("Local tweet extraction found nothing usable, falling back to the tweet formatter.")
 
+    return format_tweet(base_model_output, prompt, llm_api_key)
+
+def format_tweet(base_model_output: str, prompt: str, llm_api_key: str) -> str:
+    """
+    Clean up base model output into a tweet with the LLM tweet formatter.
+
+    Args:
+        base_model_output (str): Raw base model output
+        prompt (str): The tweet prompt, used by the formatter when the output is blank
+        llm_api_key (str): API key for Hyperbolic
+
+    Returns:
+        str: Formatted tweet, or None if formatting failed
+    """
     # TAKES BASE MODEL OUTPUT AND CLEANS IT UP AND EXTRACT THE TWEET 
     tries = 0
     max_tries = 3
     while tries < max_tries:
         try:
-            response = requests.post(
-                url="https://api.hyperbolic.xyz/v1/chat/completions",
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {llm_api_key}",
-                },
-                json = {
-                "messages": [
+            content = chat_completion(
+                "hyperbolic",
+                llm_api_key,
+                model="meta-llama/Meta-Llama-3.1-70B-Instruct",
+                messages=[
                     {
                         "role": "system",
         	            "content": f"""You are a tweet formatter. Your only job is to take the input text and format it as a tweet.
@@ -110,21 +191,81 @@ def generate_post(short_term_memory: str, long_term_memories: List[Dict], recent
                         "content": base_model_output
                     }
                 ],
-                "model": "meta-llama/Meta-Llama-3.1-70B-Instruct",
-                "max_tokens": 512,
-                "temperature": 1,
-                "top_p": 0.95,
-                "top_k": 40,
-                "stream": False,
-                }
+                engine="post_maker",
+                bypass_cache=tries > 0,
+                max_tokens=512,
+                temperature=1,
+                top_p=0.95,
+                top_k=40,
+                stream=False,
             )
+        except LLMError as e:
+            print(f"Tweet formatting failed: {str(e)}")
+            return None
+        if content and content.strip():
+            print(f"Response: {content}")
+            return content
+        tries += 1
+
+def generate_post_candidates(
+    short_term_memory: str,
+    long_term_memories: List[Dict],
+    recent_posts: List[Dict],
+    external_context,
+    llm_api_key: str,
+    n: int = POST_MAKER_CANDIDATES,
+    example_tweets: str = None
+) -> List[str]:
+    """
+    Generate up to n distinct candidate posts from one base model call.
+
+    Args:
+        short_term_memory (str): Generated short-term memory
+        long_term_memories (List[Dict]): Relevant long-term memories
+        recent_posts (List[Dict]): Recent posts from the timeline
+        external_context: Notifications and other external context
+        llm_api_key (str): API key for Hyperbolic
+        n (int): Number of base model completions to sample
+        example_tweets (str): Selected few-shot examples, None for the full example list
+
+    Returns:
+        List[str]: Candidate posts, empty if generation failed
+    """
+    prompt = get_tweet_prompt(external_context, short_term_memory, long_term_memories, recent_posts, example_tweets)
+
+    print(f"Generating {n} post candidates with prompt: {prompt}")
+
+    try:
+        outputs = completions(
+            "hyperbolic",
+            llm_api_key,
+            model="meta-llama/Meta-Llama-3.1-405B",
+            prompt=prompt,
+            n=n,
+            engine="post_maker",
+            with_finish_reason=True,
+            max_tokens=512,
+            temperature=1,
+            top_p=0.95,
+            top_k=40,
+            stop=BASE_MODEL_STOP,
+        )
+    except LLMError as e:
+        print(f"Base model generation failed: {str(e)}")
+        return []
+
+    candidates = []
+    for output, finish_reason in outputs:
+        print(f"Base model generated with response: {output}")
+        tweet = extract_tweet(output, finish_reason == "length") if POST_MAKER_LOCAL_EXTRACTOR else None
+        if tweet and tweet not in candidates:
+            candidates.append(tweet)
+
+    # Nothing could be extracted locally: format the first non-empty output with the LLM
+    if not candidates:
+        base_model_output = next((output for output, _ in outputs if output.strip()), "")
+        tweet = format_tweet(base_model_output, prompt, llm_api_key)
+        if tweet:
+            candidates.append(tweet)
 
-            if response.status_code == 200:
-                content = response.json()['choices'][0]['message']['content']
-                if content and content.strip():
-                    print(f"Response: {content}")
-                    return content
-        except Exception as e:
-            print(f"Error on attempt {tries + 1}: {str(e)}")
-            tries += 1
-            time.sleep(1)  # Add a small delay between retries
+    return candidates
@@ -1,4 +1,5 @@
 import requests
+from datetime import datetime, timezone
 from typing import List, Dict
 from sqlalchemy.orm import Session
 from models import Post
@@ -167,6 +168,19 @@ def parse_tweet_data(tweet_data):
         return f"Error parsing data: {e}"
 
 
+def parse_twitter_time(created_at: str) -> datetime:
+    """Parse a tweet's created_at, e.g. "Wed Oct 10 20:19:24 +0000 2018"."""
+    try:
+        return datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y")
+    except (TypeError, ValueError):
+        return datetime.min.replace(tzinfo=timezone.utc)
+
+
+def tweet_engagement(tweet: Dict) -> int:
+    """Likes, retweets, replies and quotes of a raw tweet object."""
+    return sum(tweet.get(key, 0) or 0 for key in ("favorite_count", "retweet_count", "reply_count", "quote_count"))
+
+
 def get_root_tweet_id(tweets, start_id):
     """Find the root tweet ID of a conversation."""
     current_id = start_id
@@ -240,9 +254,11 @@ def find_all_conversations(data):
     processed_roots = set()
     conversations = []
 
+    # Newest first, most engaged first among tweets from the same second, so prompt budgeting
+    # keeps the freshest conversations
     sorted_tweets = sorted(
         tweets.items(),
-        key=lambda x: x[1]['created_at'],
+        key=lambda x: (parse_twitter_time(x[1].get('created_at')), tweet_engagement(x[1])),
         reverse=True
     )
 
@@ -269,6 +285,20 @@ def get_timeline(account: Account) -> List[str]:
         print(timeline[0])
 
     tweets_info = parse_tweet_data(timeline[0])
+    if not isinstance(tweets_info, list):
+        print(tweets_info)
+        return []
+
+    # Newest first, most engaged first among tweets from the same second, matching the order of
+    # find_all_conversations
+    tweets_info = sorted(
+        tweets_info,
+        key=lambda t: (
+            parse_twitter_time(t["Tweet Information"]["created_at"]),
+            t["Tweet Information"]["likes"] + t["Tweet Information"]["retweets"] + t["Tweet Information"]["replies"],
+        ),
+        reverse=True
+    )
     filtered_timeline = []
     for t in tweets_info:
         timeline_tweet_text = f'New post on my timeline from @{t["Author Information"]["username"]}: {t["Tweet Information"]["text"]}\n'
@@ -281,13 +311,18 @@ def fetch_notification_context(account: Account) -> str:
     """Fetch notification context using the new Account-based approach."""
     context = []
     
+    # Replies and mentions come before timeline posts: prompts are budgeted in this order
+    print("getting notifications")
+    notifications = account.notifications()
+    print(f"getting reply trees")
+    conversations = find_all_conversations(notifications)
+    # find_all_conversations returns a message string when there is nothing to add
+    if isinstance(conversations, list):
+        context.extend(conversations)
+
     # Get timeline posts
     print("getting timeline")
     timeline = get_timeline(account)
     context.extend(timeline)
-    print("getting notifications")
-    notifications = account.notifications()
-    print(f"getting reply trees")
-    context.extend(find_all_conversations(notifications))
 
     return context
\ No newline at end of file
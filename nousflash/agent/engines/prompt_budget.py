@@ -0,0 +1,133 @@
+# Prompt Budget
+# Objective: Keep prompt length, and with it generation latency, bounded no matter how busy the
+# notifications page is. Every variable section of a prompt gets its own token budget; list sections
+# keep their highest-priority items (the caller passes them in priority order) and text sections
+# keep their leading lines.
+
+# Settings:
+# PROMPT_BUDGET_EXTERNAL_CONTEXT   tokens for notifications, conversations and timeline posts (default 2000)
+# PROMPT_BUDGET_CONTEXT_ITEM       tokens for any single context item, e.g. one long conversation (default 400)
+# PROMPT_BUDGET_SHORT_TERM_MEMORY  tokens for the short-term memory monologue (default 500)
+# PROMPT_BUDGET_LONG_TERM_MEMORIES tokens for retrieved long-term memories (default 600)
+# PROMPT_BUDGET_RECENT_POSTS       tokens for the agent's own recent posts (default 600)
+
+# Token counts are estimated at four characters per token; Llama and OpenAI tokenizers land close
+# to that on English text, and it needs no tokenizer download.
+
+import os
+import math
+from typing import Dict, List
+
+PROMPT_BUDGET_EXTERNAL_CONTEXT = int(os.getenv("PROMPT_BUDGET_EXTERNAL_CONTEXT", "2000"))
+PROMPT_BUDGET_CONTEXT_ITEM = int(os.getenv("PROMPT_BUDGET_CONTEXT_ITEM", "400"))
+PROMPT_BUDGET_SHORT_TERM_MEMORY = int(os.getenv("PROMPT_BUDGET_SHORT_TERM_MEMORY", "500"))
+PROMPT_BUDGET_LONG_TERM_MEMORIES = int(os.getenv("PROMPT_BUDGET_LONG_TERM_MEMORIES", "600"))
+PROMPT_BUDGET_RECENT_POSTS = int(os.getenv("PROMPT_BUDGET_RECENT_POSTS", "600"))
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARK = "..."
+
+# Size of the last prompt built under each name, in estimated tokens
+_prompt_sizes: Dict[str, int] = {}
+
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut a text down to at most max_tokens, on a word boundary where possible.
+
+    Args:
+        text (str): Text to shorten
+        max_tokens (int): Token budget
+
+    Returns:
+        str: The text, or its truncated prefix followed by a truncation mark
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    max_chars = max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARK))
+    cut = text[:max_chars]
+    if " " in cut[max_chars // 2:]:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip() + TRUNCATION_MARK
+
+
+def fit_items(items: List[str], budget: int, item_budget: int = PROMPT_BUDGET_CONTEXT_ITEM) -> List[str]:
+    """
+    Keep as many items as fit in the budget, favouring those earlier in the list.
+
+    Items longer than item_budget are truncated first. An item that does not fit is skipped and
+    later, smaller items may still be kept.
+
+    Args:
+        items (List[str]): Items in priority order
+        budget (int): Token budget for all items together
+        item_budget (int): Token budget for a single item
+
+    Returns:
+        List[str]: The kept items, in their original order
+    """
+    kept = []
+    used = 0
+    for item in items:
+        item = truncate_to_tokens(str(item), item_budget)
+        size = count_tokens(item)
+        if used + size > budget:
+            continue
+        kept.append(item)
+        used += size
+    if len(kept) < len(items):
+        print(f"Prompt budget kept {len(kept)} of {len(items)} context items ({used}/{budget} tokens)")
+    return kept
+
+
+def fit_text(text: str, budget: int) -> str:
+    """
+    Keep the leading lines of a text that fit in the budget, e.g. ranked memories or recent posts.
+
+    Args:
+        text (str): Text with one entry per line, most important first
+        budget (int): Token budget
+
+    Returns:
+        str: The kept lines; a single line that is too long is truncated
+    """
+    if text is None or count_tokens(text) <= budget:
+        return text
+    kept = []
+    used = 0
+    for line in text.split("\n"):
+        size = count_tokens(line) + 1
+        if used + size > budget:
+            break
+        kept.append(line)
+        used += size
+    if not kept:
+        return truncate_to_tokens(text, budget)
+    return "\n".join(kept)
+
+
+def record_prompt_size(name: str, prompt: str) -> int:
+    """
+    Record and log the estimated size of a finished prompt.
+
+    Args:
+        name (str): Prompt name, e.g. "tweet"
+        prompt (str): The rendered prompt
+
+    Returns:
+        int: Estimated tokens
+    """
+    size = count_tokens(prompt)
+    _prompt_sizes[name] = size
+    print(f"Prompt size for {name}: ~{size} tokens")
+    return size
+
+
+def get_prompt_sizes() -> Dict[str, int]:
+    """Return the estimated size of the last prompt built under each name."""
+    return dict(_prompt_sizes)
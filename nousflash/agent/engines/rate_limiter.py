@@ -0,0 +1,195 @@
+# Rate Limiter
+# Objective: Stay under each provider's request and token limits at peak without sleeping when the
+# provider is healthy. Every provider has a requests-per-minute and a tokens-per-minute token bucket
+# shared by all engines and threads, and failed attempts back off exponentially with full jitter,
+# honouring Retry-After when the provider sends it.
+
+# Settings:
+# <PROVIDER>_REQUESTS_PER_MINUTE  request budget, e.g. HYPERBOLIC_REQUESTS_PER_MINUTE (default 60, 0 disables)
+# <PROVIDER>_TOKENS_PER_MINUTE    prompt + completion token budget, e.g. OPENROUTER_TOKENS_PER_MINUTE (default 0, disabled)
+# LLM_BACKOFF_BASE                first backoff ceiling in seconds, doubled per attempt (default 0.5)
+# LLM_BACKOFF_MAX                 largest backoff ceiling in seconds (default 30)
+
+import os
+import json
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+
+# Rough characters per token, used to estimate a request's size before it is sent
+_CHARS_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute` units per minute.
+
+    A request larger than the whole bucket is let through once the bucket is full and leaves
+    it in debt, so oversized requests are slowed down instead of blocked forever.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float) -> float:
+        """
+        Block until `amount` units are available and take them.
+
+        Args:
+            amount (float): Units to take
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                needed = min(amount, self.capacity)
+                if self.level >= needed:
+                    self.level -= amount
+                    return waited
+                wait = (needed - self.level) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def adjust(self, amount: float):
+        """Take (or give back, if negative) units without waiting, e.g. to correct an estimate."""
+        with self.lock:
+            self._refill()
+            self.level = min(self.capacity, self.level - amount)
+
+
+class ProviderLimiter:
+    """Request and token budgets for one provider, plus a pause set by Retry-After."""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, estimated_tokens: int) -> float:
+        """
+        Wait until the provider may be called with a request of the estimated size.
+
+        Args:
+            estimated_tokens (int): Estimated prompt + completion tokens
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        with self.lock:
+            pause = self.paused_until - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+            waited += pause
+        if self.requests is not None:
+            waited += self.requests.acquire(1)
+        if self.tokens is not None:
+            waited += self.tokens.acquire(estimated_tokens)
+        return waited
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Correct the token budget once the response reports the real usage."""
+        if self.tokens is not None and actual_tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def pause(self, seconds: float):
+        """Hold back every caller of this provider, e.g. after a 429 with Retry-After."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """
+    Return the shared limiter for a provider, reading its budgets from the environment on first use.
+
+    Args:
+        provider (str): Provider name
+
+    Returns:
+        ProviderLimiter: The provider's limiter
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            prefix = provider.upper()
+            limiter = ProviderLimiter(
+                float(os.getenv(f"{prefix}_REQUESTS_PER_MINUTE", "60")),
+                float(os.getenv(f"{prefix}_TOKENS_PER_MINUTE", "0")),
+            )
+            _limiters[provider] = limiter
+        return limiter
+
+
+def estimate_tokens(payload: dict) -> int:
+    """Estimate prompt + completion tokens of a request body before it is sent."""
+    prompt = payload.get("prompt")
+    if prompt is None:
+        prompt = json.dumps(payload.get("messages", []), ensure_ascii=False)
+    completion_tokens = payload.get("max_tokens", 0) * payload.get("n", 1)
+    return len(prompt) // _CHARS_PER_TOKEN + completion_tokens
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date.
+
+    Args:
+        value (Optional[str]): Header value
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Delay before the next attempt: exponential backoff with full jitter, or Retry-After if longer.
+
+    Args:
+        attempt (int): Number of the attempt that just failed, starting at 1
+        retry_after (Optional[float]): Seconds requested by the provider
+
+    Returns:
+        float: Seconds to wait
+    """
+    ceiling = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** (attempt - 1))
+    delay = random.uniform(0, ceiling)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
@@ -9,11 +9,10 @@
 # processed information into an internal thought / monologue about current posts and relevance
 
 import json
-import time
 from typing import List, Dict
-import requests
 from sqlalchemy.orm import class_mapper
 from engines.prompts import get_short_term_memory_prompt
+from engines.llm_client import chat_completion, LLMError
 
 # Can modify the type depending on the format that twitter api returns for posts
 # external_context in case you want to include information from other sources 
@@ -36,15 +35,11 @@ def generate_short_term_memory(posts: List[Dict], external_context: List[str], l
     max_tries = 3
     while tries < max_tries:
         try:
-            url = "https://api.hyperbolic.xyz/v1/chat/completions"
-
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {llm_api_key}"
-            }
-            
-            data = {
-                "messages": [
+            content = chat_completion(
+                "hyperbolic",
+                llm_api_key,
+                model="meta-llama/Meta-Llama-3.1-70B-Instruct",
+                messages=[
                     {
                         "role": "system",
         	            "content": prompt
@@ -54,27 +49,19 @@ def generate_short_term_memory(posts: List[Dict], external_context: List[str], l
                         "content": "Respond only with your internal monologue based on the given context."
                     }
                 ],
-                "model": "meta-llama/Meta-Llama-3.1-70B-Instruct",
-                "max_tokens": 512,
-                "temperature": 1,
-                "top_p": 0.95,
-                "top_k": 40,
-                "stream": False,
-            }
-            
-            response = requests.post(url, headers=headers, json=data)
-            
-            if response.status_code == 200:
-                content = response.json()['choices'][0]['message']['content']
-                print(f"Short-term memory generated with response: {content}")
-                if content and content.strip():
-                    return content
-                
-            print(f"Attempt {tries + 1} failed for short-term memory generation. Status code: {response.status_code}")
-            print(f"Response: {response.text}")
-            time.sleep(5)
-            
-        except Exception as e:
-            print(f"Error on attempt {tries + 1}: {str(e)}")
-            tries += 1
-            time.sleep(5)  # Add a small delay between retries
\ No newline at end of file
+                engine="short_term_mem",
+                bypass_cache=tries > 0,
+                max_tokens=512,
+                temperature=1,
+                top_p=0.95,
+                top_k=40,
+                stream=False,
+            )
+            print(f"Short-term memory generated with response: {content}")
+            if content and content.strip():
+                return content
+            print(f"Attempt {tries + 1} returned an empty short-term memory.")
+        except LLMError as e:
+            print(f"Short-term memory generation failed: {str(e)}")
+            return None
+        tries += 1
@@ -0,0 +1,249 @@
+# Significance Model
+# Objective: Stop spending a 70B chat round trip on every post just to learn whether it clears the
+# posting and memory thresholds. A ridge regression over post embeddings, trained on the scores the
+# LLM has given so far, predicts the score locally; the LLM is only asked when the prediction falls
+# within a margin of a threshold, where a wrong guess would change what the pipeline does.
+
+# Inputs:
+# Posts and their embeddings
+# Scores given by the LLM, kept in the significance_labels table
+
+# Outputs:
+# Significance score (1-10) per post
+
+# Settings:
+# SIGNIFICANCE_MODEL_ENABLED     predict scores locally once trained; labels are collected either way (default true)
+# SIGNIFICANCE_MODEL_MIN_LABELS  LLM scores needed before the model is used (default 100)
+# SIGNIFICANCE_MODEL_MAX_LABELS  most recent LLM scores the model is fitted on (default 5000)
+# SIGNIFICANCE_MODEL_MARGIN      predictions closer than this to a threshold go to the LLM (default 1.0); widened
+#                                to the model's leave-one-out RMSE when that is larger
+# SIGNIFICANCE_MODEL_ALPHA       ridge regularisation strength (default 1.0)
+# SIGNIFICANCE_MODEL_REFIT_EVERY new LLM scores after which the model is refitted (default 10)
+
+# Only scores the large model gave here are used for training; scores from the significance_scorer
+# cascade's heuristic or small model are not (see engines/model_cascade.py). The significance scores
+# of long-term memories are not either: they only exist for posts that scored 7 or more, and seeded
+# memories carry random ones.
+
+import os
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from models import SignificanceLabel
+from db.vectors import pack_embedding, unpack_embedding, fit_embedding
+from engines.embedding_backends import get_embedding_model_name, get_embedding_dim
+from engines.significance_scorer import score_significance_with_source, score_significance_batch, SIGNIFICANCE_THRESHOLDS
+
+SIGNIFICANCE_MODEL_ENABLED = os.getenv("SIGNIFICANCE_MODEL_ENABLED", "true").lower() == "true"
+SIGNIFICANCE_MODEL_MIN_LABELS = int(os.getenv("SIGNIFICANCE_MODEL_MIN_LABELS", "100"))
+SIGNIFICANCE_MODEL_MAX_LABELS = int(os.getenv("SIGNIFICANCE_MODEL_MAX_LABELS", "5000"))
+SIGNIFICANCE_MODEL_MARGIN = float(os.getenv("SIGNIFICANCE_MODEL_MARGIN", "1.0"))
+SIGNIFICANCE_MODEL_ALPHA = float(os.getenv("SIGNIFICANCE_MODEL_ALPHA", "1.0"))
+SIGNIFICANCE_MODEL_REFIT_EVERY = int(os.getenv("SIGNIFICANCE_MODEL_REFIT_EVERY", "10"))
+
+_stats = {"local": 0, "llm": 0}
+
+
+class SignificanceModel:
+    """Ridge regression from normalised embeddings to significance scores."""
+
+    def __init__(self, embedding_model: str, dim: int):
+        self.embedding_model = embedding_model
+        self.dim = dim
+        self.labels = 0
+        self.weights: Optional[np.ndarray] = None
+        self.intercept = 0.0
+        self.loo_rmse: Optional[float] = None
+
+    @property
+    def trained(self) -> bool:
+        return self.weights is not None
+
+    @property
+    def margin(self) -> float:
+        """Distance from a threshold within which predictions go to the LLM, at least the typical error."""
+        return max(SIGNIFICANCE_MODEL_MARGIN, self.loo_rmse or 0.0)
+
+    def fit(self, embeddings: np.ndarray, scores: np.ndarray, alpha: float = SIGNIFICANCE_MODEL_ALPHA):
+        """
+        Fit the model in closed form, in whichever of the primal or dual form is smaller.
+
+        Also computes the leave-one-out RMSE from the diagonal of the hat matrix, which estimates
+        how far off a local prediction typically is.
+
+        Args:
+            embeddings (np.ndarray): One embedding per row
+            scores (np.ndarray): LLM score per row
+            alpha (float): Regularisation strength
+        """
+        X = np.asarray(embeddings, dtype=np.float64)
+        y = np.asarray(scores, dtype=np.float64)
+        mean_x = X.mean(axis=0)
+        self.intercept = float(y.mean())
+        Xc = X - mean_x
+        yc = y - self.intercept
+        n, d = Xc.shape
+
+        if n <= d:
+            gram = Xc @ Xc.T
+            coefficients = np.linalg.solve(gram + alpha * np.eye(n), np.column_stack([yc, np.eye(n)]))
+            dual, inverse = coefficients[:, 0], coefficients[:, 1:]
+            weights = Xc.T @ dual
+            hat_diagonal = np.einsum("ij,ji->i", gram, inverse)
+        else:
+            solved = np.linalg.solve(Xc.T @ Xc + alpha * np.eye(d), np.column_stack([Xc.T @ yc, Xc.T]))
+            weights = solved[:, 0]
+            hat_diagonal = np.einsum("ij,ji->i", Xc, solved[:, 1:])
+
+        residuals = yc - Xc @ weights
+        # The intercept is fitted too, adding 1/n to every point's leverage
+        loo_residuals = residuals / np.maximum(1.0 - hat_diagonal - 1.0 / n, 1e-6)
+        self.loo_rmse = float(np.sqrt(np.mean(loo_residuals ** 2)))
+        # Fold the centring into the intercept so predictions need a single dot product
+        self.weights = weights.astype(np.float32)
+        self.intercept -= float(mean_x @ weights)
+        self.labels = n
+
+    def predict(self, embeddings: List[List[float]]) -> np.ndarray:
+        """
+        Predict significance scores.
+
+        Args:
+            embeddings (List[List[float]]): Embeddings of the posts
+
+        Returns:
+            np.ndarray: Unrounded score per post
+        """
+        X = np.stack([fit_embedding(np.asarray(embedding, dtype=np.float32), self.dim) for embedding in embeddings])
+        return X @ self.weights + self.intercept
+
+
+_model: Optional[SignificanceModel] = None
+_labels_since_fit = 0
+
+
+def get_significance_model(db: Session) -> SignificanceModel:
+    """Return the model, fitting it on first use, after enough new labels, or when the embedding backend changed."""
+    global _model, _labels_since_fit
+    embedding_model = get_embedding_model_name()
+    if (
+        _model is not None
+        and _model.embedding_model == embedding_model
+        and _labels_since_fit < SIGNIFICANCE_MODEL_REFIT_EVERY
+    ):
+        return _model
+
+    dim = get_embedding_dim()
+    rows = (
+        db.query(SignificanceLabel.embedding, SignificanceLabel.score)
+        .filter(SignificanceLabel.embedding_model == embedding_model)
+        .order_by(SignificanceLabel.id.desc())
+        .limit(SIGNIFICANCE_MODEL_MAX_LABELS)
+        .all()
+    )
+    embeddings, scores = [], []
+    for blob, score in rows:
+        embedding = fit_embedding(unpack_embedding(blob), dim)
+        if embedding is not None:
+            embeddings.append(embedding)
+            scores.append(score)
+
+    _model = SignificanceModel(embedding_model, dim)
+    _model.labels = len(scores)
+    _labels_since_fit = 0
+    if len(scores) >= SIGNIFICANCE_MODEL_MIN_LABELS:
+        _model.fit(np.stack(embeddings), np.array(scores))
+        print(
+            f"Significance model fitted on {len(scores)} scores, leave-one-out RMSE {_model.loo_rmse:.2f}, "
+            f"margin {_model.margin:.2f}"
+        )
+    return _model
+
+
+def is_near_threshold(prediction: float, margin: float = SIGNIFICANCE_MODEL_MARGIN) -> bool:
+    """Return True if a prediction is too close to a threshold to act on without asking the LLM."""
+    # Predictions are rounded, so the pipeline's decisions flip half a point below each threshold
+    return any(abs(prediction - (threshold - 0.5)) < margin for threshold in SIGNIFICANCE_THRESHOLDS)
+
+
+def record_labels(db: Session, memories: List[str], embeddings: List[List[float]], scores: List[Optional[int]]):
+    """Store the scores the large model gave as training data for the model."""
+    global _labels_since_fit
+    embedding_model = get_embedding_model_name()
+    labels = [
+        SignificanceLabel(
+            content=memory,
+            embedding=pack_embedding(embedding),
+            embedding_model=embedding_model,
+            score=score,
+        )
+        for memory, embedding, score in zip(memories, embeddings, scores)
+        if score is not None
+    ]
+    if labels:
+        db.add_all(labels)
+        db.commit()
+        _labels_since_fit += len(labels)
+
+
+def score_significance_with_model(
+    db: Session,
+    memories: List[str],
+    embeddings: List[List[float]],
+    llm_api_key: str,
+) -> List[Optional[int]]:
+    """
+    Score the significance of memories locally where the model is confident, and with the LLM
+    everywhere else. Every score the large model gives is recorded to train the model further.
+    Predictions are only trusted further from a threshold than the model's typical error.
+
+    Args:
+        db (Session): Database session
+        memories (List[str]): The memories to be scored
+        embeddings (List[List[float]]): Embedding of each memory
+        llm_api_key (str): API key for Hyperbolic
+
+    Returns:
+        List[Optional[int]]: Significance score (1-10) per memory, None where the LLM returned none
+    """
+    scores: List[Optional[int]] = [None] * len(memories)
+    uncertain = list(range(len(memories)))
+
+    model = get_significance_model(db) if SIGNIFICANCE_MODEL_ENABLED else None
+    if model is not None and model.trained and memories:
+        predictions = model.predict(embeddings)
+        uncertain = []
+        for i, prediction in enumerate(predictions):
+            if is_near_threshold(prediction, model.margin):
+                uncertain.append(i)
+            else:
+                scores[i] = int(np.clip(np.rint(prediction), 1, 10))
+                print(f"Significance predicted locally: {prediction:.2f}")
+        _stats["local"] += len(memories) - len(uncertain)
+
+    if uncertain:
+        uncertain_memories = [memories[i] for i in uncertain]
+        if len(uncertain) == 1:
+            score, from_large_model = score_significance_with_source(uncertain_memories[0], llm_api_key)
+            llm_scores = [score]
+        else:
+            # Batches always go to the large model
+            llm_scores = score_significance_batch(uncertain_memories, llm_api_key)
+            from_large_model = True
+        _stats["llm"] += len(uncertain)
+        for i, score in zip(uncertain, llm_scores):
+            scores[i] = score
+        if from_large_model:
+            record_labels(db, uncertain_memories, [embeddings[i] for i in uncertain], llm_scores)
+
+    return scores
+
+
+def get_significance_model_stats() -> Dict:
+    """Return how many scores were predicted locally and how many came from the LLM, for this process."""
+    stats = dict(_stats)
+    total = stats["local"] + stats["llm"]
+    stats["local_rate"] = stats["local"] / total if total else 0.0
+    stats["labels"] = _model.labels if _model is not None else 0
+    stats["loo_rmse"] = _model.loo_rmse if _model is not None else None
+    return stats
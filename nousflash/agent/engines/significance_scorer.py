@@ -1,19 +1,73 @@
-import requests
-import time
-from engines.prompts import get_significance_score_prompt
+import re
+from typing import List, Optional, Tuple
+from engines.prompts import get_significance_score_prompt, get_batch_significance_score_prompt
+from engines.llm_client import chat_completion, LLMError
+from engines.model_cascade import cascade
+
+# The pipeline posts at a score of 3 and stores a long-term memory at 7
+SIGNIFICANCE_THRESHOLDS = (3, 7)
 
 def score_significance(memory: str, llm_api_key: str) -> int:
     """
     Score the significance of a memory on a scale of 1-10.
+
+    With the significance_scorer cascade enabled, empty memories score 1 without a call and a
+    small model's score is kept unless it lies next to a threshold.
+
+    Args:
+        memory (str): The memory to be scored
+        llm_api_key (str): API key for Hyperbolic
+
+    Returns:
+        int: Significance score (1-10)
+    """
+    return score_significance_with_source(memory, llm_api_key)[0]
+
+def score_significance_with_source(memory: str, llm_api_key: str) -> Tuple[Optional[int], bool]:
+    """
+    Score the significance of a memory like score_significance, also telling whether the score
+    came from the large model rather than the cascade's heuristic or small model.
+
+    Args:
+        memory (str): The memory to be scored
+        llm_api_key (str): API key for Hyperbolic
+
+    Returns:
+        Tuple[Optional[int], bool]: Significance score (1-10), and True if the large model gave it
+    """
+    from_large_model = False
+
+    def large_model_score() -> Optional[int]:
+        nonlocal from_large_model
+        from_large_model = True
+        return score_significance_with(memory, llm_api_key, "meta-llama/Meta-Llama-3.1-70B-Instruct")
+
+    def small_model_score(model: str) -> Optional[int]:
+        score = score_significance_with(memory, llm_api_key, model)
+        if score is None or any(threshold - 1 <= score <= threshold for threshold in SIGNIFICANCE_THRESHOLDS):
+            return None
+        return score
+
+    score = cascade(
+        "significance_scorer",
+        "hyperbolic",
+        large_model_score,
+        heuristic=lambda: 1 if not memory.strip() else None,
+        small=small_model_score,
+    )
+    return score, from_large_model
+
+def score_significance_with(memory: str, llm_api_key: str, model: str) -> Optional[int]:
+    """
+    Score the significance of a memory on a scale of 1-10 with the given model.
     
     Args:
         memory (str): The memory to be scored
-        openrouter_api_key (str): API key for OpenRouter
-        your_site_url (str): Your site URL for OpenRouter API
-        your_app_name (str): Your app name for OpenRouter API
+        llm_api_key (str): API key for Hyperbolic
+        model (str): Model name at Hyperbolic
     
     Returns:
-        int: Significance score (1-10)
+        Optional[int]: Significance score (1-10), None if no score was returned
     """
     prompt = get_significance_score_prompt(memory)
 
@@ -21,61 +75,99 @@ def score_significance(memory: str, llm_api_key: str) -> int:
     max_tries = 5
     while tries < max_tries:
         try:
-            response = requests.post(
-                url="https://api.hyperbolic.xyz/v1/chat/completions",
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {llm_api_key}",
-                },
-                json={
-                    "messages": [
-                        {
-                            "role": "system",
-        	                "content": prompt
-                        },
-                        {
-                            "role": "user",
-                            "content": "Respond only with the score you would give for the given memory."
-                        }
-                    ],
-                    "model": "meta-llama/Meta-Llama-3.1-70B-Instruct",
-                    "temperature": 1,
-                    "top_p": 0.95,
-                    "top_k": 40,
-                }
-            )
-
-            if response.status_code == 200:
-                score_str = response.json()['choices'][0]['message']['content'].strip()
-                print(f"Score generated for memory: {score_str}")
-                if score_str == "":
-                    print(f"Empty response on attempt {tries + 1}")
-                    tries += 1
-                    continue
-                
-                try:
-                    # Extract the first number found in the response
-                    # This helps handle cases where the model includes additional text
-                    import re
-                    numbers = re.findall(r'\d+', score_str)
-                    if numbers:
-                        score = int(numbers[0])
-                        return max(1, min(10, score))  # Ensure the score is between 1 and 10
-                    else:
-                        print(f"No numerical score found in response: {score_str}")
-                        tries += 1
-                        continue
-                        
-                except ValueError:
-                    print(f"Invalid score returned: {score_str}")
-                    tries += 1
-                    continue
-            else:
-                print(f"Error on attempt {tries + 1}. Status code: {response.status_code}")
-                print(f"Response: {response.text}")
-                tries += 1
-                
-        except Exception as e:
-            print(f"Error on attempt {tries + 1}: {str(e)}")
-            tries += 1 
-            time.sleep(1)  # Add a small delay between retries
\ No newline at end of file
+            score_str = chat_completion(
+                "hyperbolic",
+                llm_api_key,
+                model=model,
+                messages=[
+                    {
+                        "role": "system",
+        	            "content": prompt
+                    },
+                    {
+                        "role": "user",
+                        "content": "Respond only with the score you would give for the given memory."
+                    }
+                ],
+                engine="significance_scorer",
+                bypass_cache=tries > 0,
+                temperature=1,
+                top_p=0.95,
+                top_k=40,
+            ).strip()
+        except LLMError as e:
+            print(f"Significance scoring failed: {str(e)}")
+            return None
+
+        print(f"Score generated for memory: {score_str}")
+        if score_str == "":
+            print(f"Empty response on attempt {tries + 1}")
+            tries += 1
+            continue
+
+        # Extract the first number found in the response
+        # This helps handle cases where the model includes additional text
+        numbers = re.findall(r'\d+', score_str)
+        if numbers:
+            score = int(numbers[0])
+            return max(1, min(10, score))  # Ensure the score is between 1 and 10
+
+        print(f"No numerical score found in response: {score_str}")
+        tries += 1
+
+def score_significance_batch(memories: List[str], llm_api_key: str) -> List[Optional[int]]:
+    """
+    Score the significance of several memories on a scale of 1-10 with a single prompt.
+    
+    Args:
+        memories (List[str]): The memories to be scored
+        llm_api_key (str): API key for Hyperbolic
+    
+    Returns:
+        List[Optional[int]]: Significance score (1-10) per memory, None where no score was returned
+    """
+    prompt = get_batch_significance_score_prompt(memories)
+    scores = [None] * len(memories)
+
+    tries = 0
+    max_tries = 3
+    while tries < max_tries:
+        try:
+            scores_str = chat_completion(
+                "hyperbolic",
+                llm_api_key,
+                model="meta-llama/Meta-Llama-3.1-70B-Instruct",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": prompt
+                    },
+                    {
+                        "role": "user",
+                        "content": "Respond only with the score you would give for each numbered memory."
+                    }
+                ],
+                engine="significance_scorer",
+                bypass_cache=tries > 0,
+                temperature=1,
+                top_p=0.95,
+                top_k=40,
+            ).strip()
+        except LLMError as e:
+            print(f"Batch significance scoring failed: {str(e)}")
+            return scores
+
+        print(f"Scores generated for memories: {scores_str}")
+        # Lines look like "2: 7"; keep the first score given for each number
+        for number, score in re.findall(r'^\W*(\d+)\s*[:.)\-]\s*(\d+)', scores_str, re.MULTILINE):
+            position = int(number) - 1
+            if 0 <= position < len(scores) and scores[position] is None:
+                scores[position] = max(1, min(10, int(score)))
+
+        if all(score is not None for score in scores):
+            return scores
+
+        print(f"Scores missing on attempt {tries + 1}: {scores}")
+        tries += 1
+
+    return scores
@@ -0,0 +1,109 @@
+# Tweet Extractor
+# Objective: Pull the tweet out of raw base model output locally, applying the same rules the LLM tweet
+# formatter is prompted with, so the formatter round trip is only needed when nothing usable is found.
+
+# Inputs:
+# Raw base model output, and whether it was cut off by the token limit
+
+# Outputs:
+# Cleaned tweet text, or None when the output holds no usable tweet
+
+# Rules (mirroring the formatter prompt in post_maker.py):
+# - "Tweet:"-style labels, list numbering and wrapping quotes are removed
+# - lines of thoughts or notes about the tweet are ignored, as are preambles such as "Here's a tweet:"
+# - references to (error error ttyl) and (@tee_hee_he) are removed
+# - when several tweets are present the first one is used
+# - when the output hit the token limit, the unfinished fragment at its end is removed; output that
+#   ended on a stop sequence is finished even without a newline or final punctuation
+# - a tweet over 280 characters is cut at its last sentence end, or rejected if it has none
+# - blank output or output with only symbols is not usable
+
+import re
+from typing import Optional
+
+LABEL_PATTERN = re.compile(r"^(?:tweet|post|reply|response|output)\s*#?\d*\s*[:\-]\s*", re.IGNORECASE)
+NUMBERING_PATTERN = re.compile(r"^(?:\d+[.)]|[-*•])\s+")
+META_LINE_PATTERN = re.compile(r"^(?:thoughts?|note|explanation|context)\s*:", re.IGNORECASE)
+PREAMBLE_PATTERN = re.compile(r"^\W*(?:\w+\W+){0,3}?here(?:'s|’s| is| are)\b.*\b(?:tweets?|posts?)\b", re.IGNORECASE)
+SELF_REFERENCE_PATTERN = re.compile(r"\(?\s*(?:@tee_hee_he|error error ttyl)\s*\)?", re.IGNORECASE)
+SENTENCE_END_PATTERN = re.compile(r"[.!?…)\"']+(?=\s)")
+QUOTES = "\"'“”‘’"
+
+# Longest tweet X accepts
+MAX_TWEET_CHARS = 280
+
+
+def clean_line(line: str) -> str:
+    """
+    Apply the per-line formatting rules to one candidate tweet.
+
+    Args:
+        line (str): A single line of base model output
+
+    Returns:
+        str: The cleaned line, possibly empty
+    """
+    line = line.strip()
+    line = NUMBERING_PATTERN.sub("", line)
+    line = LABEL_PATTERN.sub("", line)
+    line = SELF_REFERENCE_PATTERN.sub(" ", line)
+    line = re.sub(r"\s+", " ", line).strip()
+    if line.endswith(",") and line[:1] in QUOTES:
+        line = line[:-1].rstrip()
+    if len(line) >= 2 and line[0] in QUOTES and line[-1] in QUOTES:
+        line = line[1:-1].strip()
+    return line
+
+
+def is_preamble(line: str) -> bool:
+    """Return True for a line introducing the tweet rather than being it, e.g. "Sure! Here's my tweet:"."""
+    line = line.strip()
+    return line.endswith(":") or bool(PREAMBLE_PATTERN.match(line))
+
+
+def remove_cut_off(text: str) -> str:
+    """Drop an unfinished trailing sentence, keeping everything up to the last sentence end."""
+    ends = list(SENTENCE_END_PATTERN.finditer(text + " "))
+    if not ends or ends[-1].end() >= len(text):
+        return text
+    return text[:ends[-1].end()].strip()
+
+
+def extract_tweet(raw_output: str, truncated: bool = False) -> Optional[str]:
+    """
+    Extract a postable tweet from raw base model output.
+
+    Args:
+        raw_output (str): Text generated by the base model
+        truncated (bool): True if generation stopped at the token limit (finish reason "length"),
+            so the end of the output may be cut off mid-sentence
+
+    Returns:
+        Optional[str]: The tweet, or None if the output contains nothing usable
+    """
+    if not raw_output:
+        return None
+
+    lines = raw_output.split("\n")
+    for position, line in enumerate(lines):
+        if META_LINE_PATTERN.match(line.strip()) or is_preamble(line):
+            continue
+        tweet = clean_line(line)
+        if not any(char.isalnum() for char in tweet):
+            continue
+
+        # Only the last line of truncated output can have been cut off; anything followed by a
+        # newline was finished
+        is_last_line = not any(rest.strip() for rest in lines[position + 1:]) and not raw_output.endswith("\n")
+        if truncated and is_last_line:
+            tweet = remove_cut_off(tweet)
+        if len(tweet) > MAX_TWEET_CHARS:
+            # A sentence end counts if the character after it still fits in the limit
+            ends = list(SENTENCE_END_PATTERN.finditer(tweet[:MAX_TWEET_CHARS + 1]))
+            if not ends:
+                # No sentence end to cut at; leave it to the LLM formatter
+                return None
+            tweet = tweet[:ends[-1].end()].strip()
+        return tweet
+
+    return None
@@ -1,6 +1,6 @@
 import os
 import re
-import requests
+import json
 import base58
 from solana.rpc.api import Client
 from solana.transaction import Transaction
@@ -16,6 +16,8 @@ from spl.token.instructions import (
     transfer as token_transfer
 )
 from engines.prompts import get_wallet_decision_prompt
+from engines.llm_client import chat_completion
+from engines.model_cascade import cascade
 
 def get_wallet_balance(private_key: str, solana_rpc_url: str) -> float:
     """
@@ -235,18 +237,20 @@ def wallet_address_in_post(posts, private_key, solana_rpc_url: str, llm_api_key:
     for post in str_posts:
         found_matches = sol_pattern.findall(post)
         matches.extend(found_matches)
-    
-    wallet_balance = get_wallet_balance(private_key, solana_rpc_url)
-    prompt = get_wallet_decision_prompt(posts, matches, wallet_balance)
-    
-    response = requests.post(
-        url="https://api.hyperbolic.xyz/v1/chat/completions",
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {llm_api_key}",
-        },
-        json={
-            "messages": [
+
+    prompt = None
+
+    def ask(model: str) -> str:
+        # The balance is only looked up once a model is asked, and only once if it escalates
+        nonlocal prompt
+        if prompt is None:
+            wallet_balance = get_wallet_balance(private_key, solana_rpc_url)
+            prompt = get_wallet_decision_prompt(posts, matches, wallet_balance)
+        return chat_completion(
+            "hyperbolic",
+            llm_api_key,
+            model=model,
+            messages=[
                 {
                     "role": "system",
                     "content": prompt
@@ -256,16 +260,28 @@ def wallet_address_in_post(posts, private_key, solana_rpc_url: str, llm_api_key:
                     "content": "Respond only with the wallet address(es) and amount(s) you would like to send to."
                 }
             ],
-            "model": "meta-llama/Meta-Llama-3.1-70B-Instruct",
-            "presence_penalty": 0,
-            "temperature": 1,
-            "top_p": 0.95,
-            "top_k": 40,
-        }
+            engine="wallet_send",
+            presence_penalty=0,
+            temperature=1,
+            top_p=0.95,
+            top_k=40,
+        )
+
+    def no_addresses():
+        # Without an address in the posts there is nowhere to send SOL
+        return "[]" if not matches else None
+
+    def small_model_declines(model: str):
+        # A small model may only decide against sending; transfers are escalated
+        content = ask(model)
+        return content if json.loads(content) == [] else None
+
+    content = cascade(
+        "wallet_send",
+        "hyperbolic",
+        lambda: ask("meta-llama/Meta-Llama-3.1-70B-Instruct"),
+        heuristic=no_addresses,
+        small=small_model_declines,
     )
-    
-    if response.status_code == 200:
-        print(f"SOL Addresses and amounts chosen from Posts: {response.json()}")
-        return response.json()['choices'][0]['message']['content']
-    else:
-        raise Exception(f"Error generating short-term memory: {response.text}")
\ No newline at end of file
+    print(f"SOL Addresses and amounts chosen from Posts: {content}")
+    return content
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import declarative_base
@@ -71,7 +71,9 @@ class LongTermMemory(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String, nullable=False)
-    embedding = Column(String, nullable=False)  # Store as JSON string
+    embedding = Column(LargeBinary, nullable=False)  # Packed float32 vector, see db/vectors.py
+    embedding_model = Column(String, index=True)  # Backend that produced the embedding
+    embedding_dim = Column(Integer)
     significance_score = Column(Float, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -88,4 +90,46 @@ class TweetPost(Base):
     __tablename__ = "tweet_posts"
 
     id = Column(Integer, primary_key=True, index=True)
-    tweet_id = Column(String, nullable=False)
\ No newline at end of file
+    tweet_id = Column(String, nullable=False)
+
+class EmbeddingCache(Base):
+    __tablename__ = "embedding_cache"
+
+    key = Column(String, primary_key=True)  # sha256 of model and text
+    model = Column(String, nullable=False)
+    embedding = Column(LargeBinary, nullable=False)  # Packed float32 vector, see db/vectors.py
+    last_used_at = Column(Float, nullable=False, index=True)
+
+class LLMResponseCache(Base):
+    __tablename__ = "llm_response_cache"
+
+    key = Column(String, primary_key=True)  # sha256 of endpoint, model, sampling params and prompt
+    engine = Column(String, nullable=False, index=True)
+    response = Column(Text, nullable=False)  # Raw JSON response body
+    created_at = Column(Float, nullable=False, index=True)
+    last_used_at = Column(Float, nullable=False, index=True)
+
+class LLMCall(Base):
+    __tablename__ = "llm_calls"
+
+    id = Column(Integer, primary_key=True, index=True)
+    engine = Column(String, nullable=False, index=True)
+    kind = Column(String, nullable=False)  # chat, completion, stream or embedding
+    provider = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    prompt_tokens = Column(Integer)
+    completion_tokens = Column(Integer)
+    latency = Column(Float, nullable=False)  # Seconds, including retries
+    retries = Column(Integer, nullable=False, default=0)
+    outcome = Column(String, nullable=False)  # ok, cached, cancelled or error
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class SignificanceLabel(Base):
+    __tablename__ = "significance_labels"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content = Column(String, nullable=False)
+    embedding = Column(LargeBinary, nullable=False)  # Packed float32 vector, see db/vectors.py
+    embedding_model = Column(String, nullable=False, index=True)  # Backend that produced the embedding
+    score = Column(Integer, nullable=False)  # Significance score given by the LLM
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
@@ -1,7 +1,9 @@
+import os
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.orm import Session
-from db.db_setup import get_db
+from db.db_setup import get_db, SessionLocal
 from engines.post_retriever import (
     retrieve_recent_posts,
     fetch_external_context,
@@ -11,11 +13,19 @@ from engines.post_retriever import (
 from engines.short_term_mem import generate_short_term_memory
 from engines.long_term_mem import (
     create_embedding,
+    create_embeddings,
     retrieve_relevant_memories,
     store_memory,
 )
-from engines.post_maker import generate_post
+from engines.embedding_cache import get_cache_stats
+from engines.hedging import get_hedge_stats
+from engines.llm_router import get_router_stats
+from engines.prompts import get_render_stats
+from engines.model_cascade import get_cascade_stats
+from engines.example_selector import select_example_tweets, TWEET_EXAMPLES_TOP_K
+from engines.post_maker import generate_post, generate_post_candidates, POST_MAKER_CANDIDATES
 from engines.significance_scorer import score_significance
+from engines.significance_model import score_significance_with_model, get_significance_model_stats
 from engines.post_sender import send_post, send_post_API
 from engines.wallet_send import (
     transfer_sol, 
@@ -29,94 +39,197 @@ from engines.token_actions import decide_token_actions
 from models import Post, User, TweetPost, TokenTransaction
 from twitter.account import Account
 
-def process_wallet_operations(
-    db: Session,
+# Run the wallet, token and follow LLM decisions concurrently instead of one after another
+PIPELINE_CONCURRENT_DECISIONS = os.getenv("PIPELINE_CONCURRENT_DECISIONS", "false").lower() == "true"
+
+def decide_wallet_transfers(
     notif_context: list,
     private_key: str,
     solana_rpc_url: str,
     llm_api_key: str
-):
-    """Handle all wallet-related operations including SOL transfers and token actions"""
+) -> list:
+    """Ask the LLM which wallets to send SOL to. Has no side effects."""
     balance_sol = get_wallet_balance(private_key, solana_rpc_url)
     print(f"Agent wallet balance is {balance_sol} SOL now.\n")
-    
-    # Process SOL transfers if balance is sufficient
-    if balance_sol > 0.5:  # Adjusted threshold for SOL
-        tries = 0
-        max_tries = 2
-        while tries < max_tries:
+
+    # Only consider SOL transfers if balance is sufficient
+    if balance_sol <= 0.5:  # Adjusted threshold for SOL
+        return []
+
+    tries = 0
+    max_tries = 2
+    while tries < max_tries:
+        try:
             wallet_data = wallet_address_in_post(
                 notif_context, private_key, solana_rpc_url, llm_api_key
             )
             print(f"Wallet addresses and amounts chosen from Posts: {wallet_data}")
-            try:
-                wallets = json.loads(wallet_data)
-                if len(wallets) > 0:
-                    for wallet in wallets:
-                        address = wallet["address"]
-                        amount = wallet["amount"]
-                        tx_signature = transfer_sol(
-                            private_key, solana_rpc_url, address, amount
-                        )
-                        # Store transaction in database
-                        store_transaction(db, "SOL", tx_signature, address, amount)
-                    break
-                else:
-                    print("No wallet addresses or amounts to send SOL to.")
-                    break
-            except Exception as e:
-                print(f"Error in wallet operations: {e}")
-                tries += 1
+            return json.loads(wallet_data)
+        except Exception as e:
+            print(f"Error in wallet decision: {e}")
+            tries += 1
+    return []
 
-def process_token_operations(
+def apply_wallet_transfers(
+    db: Session,
+    wallets: list,
+    private_key: str,
+    solana_rpc_url: str
+):
+    """Send SOL to the wallets chosen by decide_wallet_transfers"""
+    if not wallets:
+        print("No wallet addresses or amounts to send SOL to.")
+        return
+    for wallet in wallets:
+        try:
+            address = wallet["address"]
+            amount = wallet["amount"]
+            tx_signature = transfer_sol(
+                private_key, solana_rpc_url, address, amount
+            )
+            # Store transaction in database
+            store_transaction(db, "SOL", tx_signature, address, amount)
+        except Exception as e:
+            print(f"Error in wallet operations: {e}")
+
+def process_wallet_operations(
     db: Session,
     notif_context: list,
     private_key: str,
     solana_rpc_url: str,
     llm_api_key: str
 ):
-    """Handle token-related operations including creation and transfers"""
+    """Handle all wallet-related operations including SOL transfers and token actions"""
+    wallets = decide_wallet_transfers(notif_context, private_key, solana_rpc_url, llm_api_key)
+    apply_wallet_transfers(db, wallets, private_key, solana_rpc_url)
+
+def decide_token_operations(notif_context: list, llm_api_key: str) -> list:
+    """Ask the LLM which tokens to create or transfer. Has no side effects."""
     tries = 0
     max_tries = 2
     while tries < max_tries:
         try:
             # Get token action decisions from LLM
             token_actions = decide_token_actions(notif_context, llm_api_key)
-            actions = json.loads(token_actions)
-            
-            for action in actions:
-                if action["type"] == "create":
-                    # Create new token
-                    token_info = create_token(
-                        private_key,
-                        solana_rpc_url,
-                        action["name"],
-                        action["symbol"],
-                        action.get("decimals", 9)
-                    )
-                    store_token_creation(db, token_info)
-                
-                elif action["type"] == "transfer":
-                    # Transfer existing tokens
-                    tx_signature = transfer_token(
-                        private_key,
-                        solana_rpc_url,
-                        action["token_mint"],
-                        action["to_address"],
-                        action["amount"],
-                        action.get("decimals", 9)
-                    )
-                    store_transaction(
-                        db, 
-                        action["token_mint"], 
-                        tx_signature,
-                        action["to_address"],
-                        action["amount"]
-                    )
-            break
+            return json.loads(token_actions)
+        except Exception as e:
+            print(f"Error in token decision: {e}")
+            tries += 1
+    return []
+
+def apply_token_operations(
+    db: Session,
+    actions: list,
+    private_key: str,
+    solana_rpc_url: str
+):
+    """Create and transfer tokens as decided by decide_token_operations"""
+    for action in actions:
+        try:
+            if action["type"] == "create":
+                # Create new token
+                token_info = create_token(
+                    private_key,
+                    solana_rpc_url,
+                    action["name"],
+                    action["symbol"],
+                    action.get("decimals", 9)
+                )
+                store_token_creation(db, token_info)
+
+            elif action["type"] == "transfer":
+                # Transfer existing tokens
+                tx_signature = transfer_token(
+                    private_key,
+                    solana_rpc_url,
+                    action["token_mint"],
+                    action["to_address"],
+                    action["amount"],
+                    action.get("decimals", 9)
+                )
+                store_transaction(
+                    db, 
+                    action["token_mint"], 
+                    tx_signature,
+                    action["to_address"],
+                    action["amount"]
+                )
         except Exception as e:
             print(f"Error in token operations: {e}")
+
+def process_token_operations(
+    db: Session,
+    notif_context: list,
+    private_key: str,
+    solana_rpc_url: str,
+    llm_api_key: str
+):
+    """Handle token-related operations including creation and transfers"""
+    actions = decide_token_operations(notif_context, llm_api_key)
+    apply_token_operations(db, actions, private_key, solana_rpc_url)
+
+def decide_follows(db: Session, notif_context: list, openrouter_api_key: str) -> list:
+    """Ask the LLM which users to follow. Only records newly seen usernames in the database."""
+    print("Deciding following now")
+    tries = 0
+    max_tries = 2
+    while tries < max_tries:
+        try:
+            decision_data = decide_to_follow_users(db, notif_context, openrouter_api_key)
+            return json.loads(decision_data)
+        except Exception as e:
+            print(f"Error in follow decision: {e}")
             tries += 1
+    return []
+
+def apply_follows(account: Account, decisions: list):
+    """Follow the users chosen by decide_follows"""
+    if not decisions:
+        print("No users to follow.")
+        return
+    for decision in decisions:
+        try:
+            username = decision["username"]
+            score = decision["score"]
+            if score > 0.98:
+                follow_by_username(account, username)
+                print(f"user {username} has a high rizz of {score}, now following.")
+            else:
+                print(f"Score {score} for user {username} is below threshold.")
+        except Exception as e:
+            print(f"Error in following users: {e}")
+
+def decide_concurrently(
+    notif_context: list,
+    private_key: str,
+    solana_rpc_url: str,
+    llm_api_key: str,
+    openrouter_api_key: str
+):
+    """
+    Run the wallet, token and follow decisions in parallel threads.
+
+    The three decisions read the same notif_context and have no side effects
+    beyond recording usernames, so they are independent. The follow decision
+    gets its own database session because sessions are not thread-safe.
+
+    Returns:
+        tuple: (wallets, token_actions, follow_decisions)
+    """
+    def follow_with_own_session():
+        follow_db = SessionLocal()
+        try:
+            return decide_follows(follow_db, notif_context, openrouter_api_key)
+        finally:
+            follow_db.close()
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        wallets = executor.submit(
+            decide_wallet_transfers, notif_context, private_key, solana_rpc_url, llm_api_key
+        )
+        token_actions = executor.submit(decide_token_operations, notif_context, llm_api_key)
+        follow_decisions = executor.submit(follow_with_own_session)
+        return wallets.result(), token_actions.result(), follow_decisions.result()
 
 def store_transaction(
     db: Session, 
@@ -191,40 +304,24 @@ def run_pipeline(
         print(f"- {notif[0]}, tweet at https://x.com/user/status/{notif[1]}\n")
     external_context = notif_context
 
-    if len(notif_context) > 0:
+    if len(notif_context) > 0 and PIPELINE_CONCURRENT_DECISIONS:
+        # Step 2.5-2.75: Issue the independent LLM decisions together,
+        # then apply their side effects in the same order as below
+        wallets, token_actions, follow_decisions = decide_concurrently(
+            notif_context, private_key, solana_rpc_url, llm_api_key, openrouter_api_key
+        )
+        apply_wallet_transfers(db, wallets, private_key, solana_rpc_url)
+        apply_token_operations(db, token_actions, private_key, solana_rpc_url)
+        apply_follows(account, follow_decisions)
+
+    elif len(notif_context) > 0:
         # Step 2.5: Process wallet and token operations
+        # Provider rate limits are enforced by the shared limiter in engines/rate_limiter.py
         process_wallet_operations(db, notif_context, private_key, solana_rpc_url, llm_api_key)
-        time.sleep(5)
-        
         process_token_operations(db, notif_context, private_key, solana_rpc_url, llm_api_key)
-        time.sleep(5)
 
         # Step 2.75: Handle user following
-        print("Deciding following now")
-        tries = 0
-        max_tries = 2
-        while tries < max_tries:
-            try:
-                decision_data = decide_to_follow_users(db, notif_context, openrouter_api_key)
-                decisions = json.loads(decision_data)
-                if len(decisions) > 0:
-                    for decision in decisions:
-                        username = decision["username"]
-                        score = decision["score"]
-                        if score > 0.98:
-                            follow_by_username(account, username)
-                            print(f"user {username} has a high rizz of {score}, now following.")
-                        else:
-                            print(f"Score {score} for user {username} is below threshold.")
-                    break
-                else:
-                    print("No users to follow.")
-                    break
-            except Exception as e:
-                print(f"Error in following users: {e}")
-                tries += 1
-
-    time.sleep(5)
+        apply_follows(account, decide_follows(db, notif_context, openrouter_api_key))
 
     # Steps 3-9: Memory and post generation (unchanged)
     short_term_memory = generate_short_term_memory(
@@ -235,22 +332,68 @@ def run_pipeline(
     short_term_embedding = create_embedding(short_term_memory, openai_api_key)
     long_term_memories = retrieve_relevant_memories(db, short_term_embedding)
     print(f"Long-term memories: {long_term_memories}")
+    print(f"Embedding cache: {get_cache_stats()}")
 
-    new_post_content = generate_post(
-        short_term_memory, 
-        long_term_memories, 
-        formatted_recent_posts, 
-        external_context, 
-        llm_api_key
-    )
-    new_post_content = new_post_content.strip('"')
-    print(f"New post content: {new_post_content}")
+    # Few-shot examples closest to the current short-term memory, or the full list
+    example_tweets = None
+    if TWEET_EXAMPLES_TOP_K > 0:
+        example_tweets = select_example_tweets(short_term_embedding, openai_api_key)
 
-    significance_score = score_significance(new_post_content, llm_api_key)
+    if POST_MAKER_CANDIDATES > 1:
+        # Sample several posts and score them in one prompt, keeping the most significant one,
+        # so fewer cycles end with a post below the posting threshold
+        candidates = [
+            candidate.strip('"') for candidate in generate_post_candidates(
+                short_term_memory,
+                long_term_memories,
+                formatted_recent_posts,
+                external_context,
+                llm_api_key,
+                example_tweets=example_tweets
+            )
+        ]
+        if not candidates:
+            print("No post candidates were generated, skipping this cycle.")
+            return
+        candidate_embeddings = create_embeddings(candidates, openai_api_key)
+        scores = score_significance_with_model(db, candidates, candidate_embeddings, llm_api_key)
+        for candidate, score in zip(candidates, scores):
+            print(f"Candidate scored {score}: {candidate}")
+        new_post_content, significance_score, new_post_embedding = max(
+            zip(candidates, scores, candidate_embeddings), key=lambda candidate: candidate[1] or 0
+        )
+        print(f"New post content: {new_post_content}")
+        if significance_score is None:
+            significance_score = score_significance(new_post_content, llm_api_key)
+    else:
+        new_post_content = generate_post(
+            short_term_memory, 
+            long_term_memories, 
+            formatted_recent_posts, 
+            external_context, 
+            llm_api_key,
+            example_tweets=example_tweets
+        )
+        new_post_content = new_post_content.strip('"')
+        print(f"New post content: {new_post_content}")
+
+        new_post_embedding = create_embedding(new_post_content, openai_api_key)
+        significance_score = score_significance_with_model(
+            db, [new_post_content], [new_post_embedding], llm_api_key
+        )[0]
     print(f"Significance score: {significance_score}")
+    print(f"Significance model: {get_significance_model_stats()}")
+    print(f"LLM hedging: {get_hedge_stats()}")
+    print(f"LLM providers: {get_router_stats()}")
+    print(f"Prompt rendering: {get_render_stats()}")
+    print(f"Model cascade: {get_cascade_stats()}")
+
+    if significance_score is None:
+        # Scoring failed, so neither threshold can be checked
+        print("No significance score for the new post, skipping storing and posting it.")
+        return
 
     if significance_score >= 7:
-        new_post_embedding = create_embedding(new_post_content, openai_api_key)
         store_memory(db, new_post_content, new_post_embedding, significance_score)
 
     ai_user = db.query(User).filter(User.username == "orange_hey_hey").first()
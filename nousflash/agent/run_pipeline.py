@@ -2,9 +2,12 @@ import os
 import time
 import random
 from datetime import datetime, timedelta
-from db.db_setup import create_database, get_db
+from db.db_setup import create_database, migrate_database, get_db
 from db.db_seed import seed_database
 from pipeline import run_pipeline
+from engines.memory_index import get_memory_index
+from engines.memory_consolidation import consolidate_memories
+from engines.prompts import load_prompts
 from dotenv import load_dotenv
 import secrets
 import hashlib
@@ -58,6 +61,9 @@ def get_next_run_time():
 def main():
     load_dotenv()
 
+    # Parse and validate prompt templates up front so a bad TWEET_PROMPT_TEMPLATE fails at startup
+    load_prompts()
+
     # Check if the database file exists
     if not os.path.exists("./data/agents.db"):
         print("Creating database...")
@@ -66,9 +72,13 @@ def main():
         seed_database()
     else:
         print("Database already exists. Skipping creation and seeding.")
+        migrate_database()
 
     db = next(get_db())
 
+    # Load long-term memory embeddings into the resident index once per process
+    get_memory_index(db)
+
     # Load environment variables
     api_keys = {
         "llm_api_key": os.getenv("HYPERBOLIC_API_KEY"),
@@ -130,6 +140,12 @@ def main():
             print(f"Deactivation time: {deactivation_time.strftime('%I:%M:%S %p')}")
             print(f"Duration: {active_duration.total_seconds() / 60:.1f} minutes")
 
+            # Consolidate long-term memory while the pipeline is idle
+            try:
+                consolidate_memories(db)
+            except Exception as e:
+                print(f"Error consolidating memories: {e}")
+
             # Wait until activation time
             while datetime.now() < activation_time:
                 time.sleep(60)  # Check every minute